@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+from dataclasses import dataclass
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -15,15 +16,28 @@ AUDIO_DIR = STORAGE_DIR / "audio"
 RESULTS_DIR = STORAGE_DIR / "results"
 TEMP_DIR = STORAGE_DIR / "temp"
 
+# persistent LLM response cache (diskcache)
+LLM_CACHE_DIR = RESULTS_DIR / "llm_cache"
+
+# compiled Jinja2 templates (bytecode cache, survives restarts)
+JINJA_CACHE_DIR = STORAGE_DIR / ".jinja_cache"
+
 # NEW: downloads dir for optional URL download mode (yt-dlp output)
 DOWNLOADS_DIR = STORAGE_DIR / "downloads"
 
+# Chatbot: session memory, recorded voice clips, generated TTS replies
+CHAT_SESSIONS_DIR = STORAGE_DIR / "chat_sessions"
+CHAT_VOICE_DIR = STORAGE_DIR / "chat_voice"
+CHAT_TTS_DIR = STORAGE_DIR / "chat_tts"
+
 # -----------------------------
 # Bangla TF ASR (SavedModel)
 # -----------------------------
 BN_SAVEDMODEL_DIR = MODELS_DIR / "bn_asr_savedmodel"
 BN_VOCAB_PATH = MODELS_DIR / "bn_vocab" / "vocab.json"
 BN_PREPROCESS_PATH = MODELS_DIR / "bn_preprocess" / "preprocess.json"
+# INT8 (dynamic-range) TFLite copy of the SavedModel, converted on first load
+BN_TFLITE_PATH = MODELS_DIR / "bn_asr_int8.tflite"
 
 # -----------------------------
 # English ASR (Vosk)
@@ -45,13 +59,50 @@ MAX_UPLOAD_MB = 500
 # Optional DEV mode:
 # - Set environment variable ALLOW_NET_DOWNLOAD=1
 # - Then system may download from URL using yt-dlp (requires internet)
-ALLOW_NET_DOWNLOAD = os.environ.get("ALLOW_NET_DOWNLOAD", "0") == "1"
 
-# yt-dlp executable name (in case you want to override)
-YTDLP_BIN = os.environ.get("YTDLP_BIN", "yt-dlp")
+# -----------------------------
+# Environment settings (read once at import)
+# -----------------------------
+def _env_int(name: str) -> int | None:
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    ollama_model: str
+    # None => each LLM service keeps its own default timeout
+    ollama_timeout_sec: int | None
+    # context window for EVERY Ollama call (see ollama_client.ollama_options).
+    # Sized for the largest prompt: chat history, or the combined
+    # social-context + motion-coach prompt with its full JSON answer.
+    # Keep it fixed: a different num_ctx reloads the model and invalidates
+    # Ollama's KV cache for the static prompt prefixes.
+    ollama_num_ctx: int
+    # run Bangla ASR on the INT8 TFLite model (falls back to the SavedModel)
+    bn_asr_tflite: bool
+    allow_net_download: bool
+    ytdlp_bin: str
+    ffmpeg_bin: str
+
+
+SETTINGS = Settings(
+    ollama_model=os.environ.get("OLLAMA_MODEL", "llama3.1:8b"),
+    ollama_timeout_sec=_env_int("OLLAMA_TIMEOUT_SEC"),
+    ollama_num_ctx=_env_int("OLLAMA_NUM_CTX") or 4096,
+    bn_asr_tflite=os.environ.get("BN_ASR_TFLITE", "1") == "1",
+    allow_net_download=os.environ.get("ALLOW_NET_DOWNLOAD", "0") == "1",
+    # yt-dlp executable name (in case you want to override)
+    ytdlp_bin=os.environ.get("YTDLP_BIN", "yt-dlp"),
+    # ffmpeg executable name (override if needed)
+    ffmpeg_bin=os.environ.get("FFMPEG_BIN", "ffmpeg"),
+)
 
-# ffmpeg executable name (override if needed)
-FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+ALLOW_NET_DOWNLOAD = SETTINGS.allow_net_download
+YTDLP_BIN = SETTINGS.ytdlp_bin
+FFMPEG_BIN = SETTINGS.ffmpeg_bin
 
 # -----------------------------
 # Motion analysis (Phase-2)
@@ -1,16 +1,81 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+
+_listener: logging.handlers.QueueListener | None = None
+_memory_handler: logging.handlers.MemoryHandler | None = None
+_flush_stop: threading.Event | None = None
+
+FLUSH_INTERVAL_SEC = 1.0
+
+
+def _flush_periodically(handler: logging.handlers.MemoryHandler, stop: threading.Event) -> None:
+    # bounds how long an INFO line can sit in the buffer
+    while not stop.wait(FLUSH_INTERVAL_SEC):
+        handler.flush()
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Request threads only enqueue records; a background QueueListener owns
+    the real stdout handler so no request blocks on a write syscall.
+    Records are batched in a MemoryHandler (ERROR and above flush at once).
+    """
+    global _listener, _memory_handler, _flush_stop
+    stop_logging()
 
-def setup_logging() -> None:
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
-    handler = logging.StreamHandler(sys.stdout)
+    stream_handler = logging.StreamHandler(sys.stdout)
     fmt = logging.Formatter(
         fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
-    handler.setFormatter(fmt)
+    stream_handler.setFormatter(fmt)
+
+    _memory_handler = logging.handlers.MemoryHandler(
+        capacity=int(os.environ.get("LOG_BUFFER", "512")),
+        flushLevel=logging.ERROR,
+        target=stream_handler,
+        flushOnClose=True,
+    )
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(q)
 
     logger.handlers.clear()
-    logger.addHandler(handler)
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(q, _memory_handler, respect_handler_level=True)
+    _listener.start()
+
+    _flush_stop = threading.Event()
+    threading.Thread(
+        target=_flush_periodically,
+        args=(_memory_handler, _flush_stop),
+        name="log-flush",
+        daemon=True,
+    ).start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued/buffered records and stop background threads (safe to call twice)."""
+    global _listener, _memory_handler, _flush_stop
+    if _flush_stop is not None:
+        _flush_stop.set()
+        _flush_stop = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _memory_handler is not None:
+        _memory_handler.close()
+        _memory_handler = None
+
+
+atexit.register(stop_logging)
@@ -13,39 +13,73 @@ os.environ["TF_DISABLE_MPS"] = "1"                # best effort
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 
 
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
 
-from backend.logging_setup import setup_logging
+from backend.logging_setup import setup_logging, stop_logging
 from backend.routes.web import router as web_router
 from backend.routes.api import router as api_router
 from backend.services.storage import ensure_dirs
-
-import os
+from backend.config import CHAT_TTS_DIR, SETTINGS
+from backend.services.ollama_client import aclose_client as aclose_ollama_client, warmup_model
+from backend.services.url_downloader import aclose_client as aclose_download_client
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Offline AI Hackathon System", version="1.0.0")
 
-# Mount storage for generated TTS files
-app.mount("/generated", StaticFiles(directory="backend/storage"), name="generated")
-app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
-app.include_router(web_router)
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with a Cache-Control header so browser re-GETs revalidate to 304.
+    "private": browser cache only, never shared proxies.
+    """
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    def file_response(self, *args, **kwargs) -> Response:
+        resp = super().file_response(*args, **kwargs)
+        resp.headers.setdefault("Cache-Control", "private, max-age=3600")
+        return resp
+
+
+def _configure_app(app: FastAPI) -> None:
+    """Register every mount and router exactly once."""
+    # Generated TTS replies only: the rest of storage (chat sessions, uploads,
+    # results, LLM cache) is private and is not served at all.
+    # TTS file names are unique per reply, so they are safe to cache.
+    # check_dir=False: the dir is created by ensure_dirs() at startup.
+    app.mount("/generated/chat_tts", CachedStaticFiles(directory=CHAT_TTS_DIR, html=False, check_dir=False), name="generated_tts")
+    app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
-# static
-app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
+    app.include_router(web_router)
+    app.include_router(api_router)
 
-app.include_router(web_router)
-app.include_router(api_router)
+
+_configure_app(app)
+
+_warmup_task: asyncio.Task | None = None
 
 @app.on_event("startup")
-def _startup():
+async def _startup():
+    global _warmup_task
     ensure_dirs()
+    # load the LLM in the background so the first request skips the cold start
+    # (warmup_model uses the same ollama_options() as every real call)
+    _warmup_task = asyncio.create_task(warmup_model(model=SETTINGS.ollama_model))
     logger.info("Startup complete. Offline AI system is ready.")
+
+@app.on_event("shutdown")
+async def _shutdown():
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    await aclose_ollama_client()
+    await aclose_download_client()
+    logger.info("Shutting down.")
+    stop_logging()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
@@ -1,26 +1,37 @@
 from __future__ import annotations
+import asyncio
+import json
+import logging
 import uuid
 from pathlib import Path
+from typing import Any
 from fastapi import APIRouter, Request, UploadFile, Form, File
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
-from backend.services.storage import ensure_dirs
+from backend.config import JINJA_CACHE_DIR
+from backend.config import CHAT_SESSIONS_DIR as CHAT_DIR, CHAT_VOICE_DIR as VOICE_DIR, CHAT_TTS_DIR as TTS_DIR
+
+from backend.services.storage import stream_upload_to_disk
 from backend.services.pipeline import run_full_pipeline
 from backend.services.video_ingest import save_upload_to_disk, resolve_url_offline, IngestError
-from backend.services.url_downloader import download_video_from_url
+from backend.services.url_downloader import download_video
 from backend.services.chat_memory import load_history
-from backend.services.chat_service import chat_with_memory
+from backend.services.chat_service import chat_with_memory, chat_stream_with_memory
 
 # Correct Imports
 from backend.services.stt_whispercpp import stt_whispercpp, STTError
 from backend.services.tts_piper import tts_piper, TTSError
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 templates = Jinja2Templates(directory="frontend/templates")
-CHAT_DIR = Path("backend/storage/chat_sessions")
-VOICE_DIR = Path("backend/storage/chat_voice")
-TTS_DIR = Path("backend/storage/chat_tts")
+# compiled templates persist across restarts; no per-render mtime checks
+templates.env.bytecode_cache = FileSystemBytecodeCache(directory=str(JINJA_CACHE_DIR))
+templates.env.auto_reload = False
+templates.env.cache_size = 400
 
 def _get_or_make_session_id(request: Request, provided: str | None) -> str:
     sid = (provided or "").strip()
@@ -31,36 +42,87 @@ def _get_or_make_session_id(request: Request, provided: str | None) -> str:
 
 @router.get("/", response_class=HTMLResponse)
 def index(request: Request):
-    ensure_dirs()
     return templates.TemplateResponse("index.html", {"request": request})
 
+async def _resolve_video(video_file: UploadFile | None, video_url: str | None) -> Path | None:
+    if video_file and video_file.filename:
+        return await save_upload_to_disk(video_file.filename, video_file)
+    if video_url and video_url.strip():
+        url = video_url.strip()
+        try:
+            return resolve_url_offline(url)
+        except IngestError:
+            return await download_video(url)
+    return None
+
 @router.post("/run", response_class=HTMLResponse)
 async def run_from_web(request: Request, video_file: UploadFile|None=None, video_url: str|None=Form(default=None), text_hint: str|None=Form(default=None)):
-    ensure_dirs()
-    video_path = None
     try:
-        if video_file and video_file.filename:
-            data = await video_file.read()
-            video_path = save_upload_to_disk(video_file.filename, data)
-        elif video_url and video_url.strip():
-            url = video_url.strip()
-            try:
-                video_path = resolve_url_offline(url)
-            except IngestError:
-                video_path = download_video_from_url(url)
-        else:
+        video_path = await _resolve_video(video_file, video_url)
+        if video_path is None:
             return templates.TemplateResponse("result.html", {"request": request, "error": "No input provided."})
         
-        result = run_full_pipeline(video_path=video_path, text_hint=text_hint)
+        result = await run_full_pipeline(video_path=video_path, text_hint=text_hint)
         return templates.TemplateResponse("result.html", {"request": request, "result": result, "error": None})
     except Exception as e:
         return templates.TemplateResponse("result.html", {"request": request, "error": str(e)})
 
+@router.post("/run/stream")
+async def run_stream(request: Request, video_file: UploadFile|None=None, video_url: str|None=Form(default=None), text_hint: str|None=Form(default=None)):
+    """
+    Same form as POST /run, answered as Server-Sent Events:
+    `event: social_context` / `event: motion_coach` (JSON UI fields) as soon
+    as each LLM answer is parsed, then `event: done` with the rendered result
+    page (JSON-encoded HTML).
+    """
+    # ingest before streaming: the upload is only readable inside this call
+    page: dict = {"request": request, "result": None, "error": None}
+    video_path = None
+    try:
+        video_path = await _resolve_video(video_file, video_url)
+        if video_path is None:
+            page["error"] = "No input provided."
+    except Exception as e:
+        page["error"] = str(e)
+
+    queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+
+    async def run() -> None:
+        html = ""
+        try:
+            if video_path is not None:
+                try:
+                    page["result"] = await run_full_pipeline(
+                        video_path=video_path,
+                        text_hint=text_hint,
+                        on_event=lambda name, fields: queue.put_nowait((name, fields)),
+                    )
+                except Exception as e:
+                    page["error"] = str(e)
+            html = templates.get_template("result.html").render(page)
+        except Exception:
+            logger.exception("Rendering the streamed result page failed")
+        finally:
+            queue.put_nowait(("done", html))
+
+    async def events():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                name, data = await queue.get()
+                yield f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+                if name == "done":
+                    break
+        finally:
+            # client went away: drop the pipeline (and its LLM stream) with it
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.get("/chat", response_class=HTMLResponse)
 def chat_page(request: Request, session_id: str|None=None, mood: str="default"):
-    ensure_dirs()
     sid = _get_or_make_session_id(request, session_id)
-    session_file = CHAT_DIR / f"{sid}.json"
+    session_file = CHAT_DIR / f"{sid}.jsonl"
     messages = load_history(session_file)
     resp = templates.TemplateResponse("chat.html", {"request": request, "session_id": sid, "mood": mood, "messages": messages})
     resp.set_cookie("echomind_chat_session", sid)
@@ -69,25 +131,43 @@ def chat_page(request: Request, session_id: str|None=None, mood: str="default"):
 @router.post("/chat", response_class=HTMLResponse)
 async def chat_from_web(request: Request, message: str|None=Form(default=None), mood: str|None=Form(default="default"), session_id: str|None=Form(default=None)):
     sid = _get_or_make_session_id(request, session_id)
-    session_file = CHAT_DIR / f"{sid}.json"
-    r = chat_with_memory(session_file=session_file, user_text=(message or "").strip(), mood=mood or "default", model="llama3.1:8b")
+    session_file = CHAT_DIR / f"{sid}.jsonl"
+    # sync Ollama call + session file I/O: keep it off the event loop
+    r = await asyncio.to_thread(chat_with_memory, session_file=session_file, user_text=(message or "").strip(), mood=mood or "default", model="llama3.1:8b")
     messages = load_history(session_file)
     return templates.TemplateResponse("chat.html", {"request": request, "session_id": sid, "mood": mood, "messages": messages, "reply": r.reply})
+
+@router.get("/chat/stream")
+async def chat_stream(request: Request, message: str = "", mood: str = "default", session_id: str|None=None):
+    """
+    Server-Sent Events: one `data:` event per token (JSON-encoded string),
+    then `event: done`. The turn is saved to memory once the reply completes.
+    """
+    sid = _get_or_make_session_id(request, session_id)
+    session_file = CHAT_DIR / f"{sid}.jsonl"
+
+    async def events():
+        async for token in chat_stream_with_memory(session_file=session_file, user_text=message, mood=mood or "default", model="llama3.1:8b"):
+            yield f"data: {json.dumps(token, ensure_ascii=False)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    resp = StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    resp.set_cookie("echomind_chat_session", sid)
+    return resp
+
 @router.post("/chat/reset", response_class=HTMLResponse)
 async def chat_reset(request: Request, session_id: str | None = Form(default=None)):
     """
-    Delete the session JSON file and reload the chat page.
+    Delete the session JSONL file and reload the chat page.
     """
-    ensure_dirs()
     sid = _get_or_make_session_id(request, session_id)
-    session_file = CHAT_DIR / f"{sid}.json"
+    session_file = CHAT_DIR / f"{sid}.jsonl"
 
     # Delete the session file if it exists
-    if session_file.exists():
-        try:
-            session_file.unlink()
-        except Exception as e:
-            print(f"Error deleting session file: {e}")
+    try:
+        session_file.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning("Error deleting session file: %s", e)
 
     # Redirect or Render clean chat page
     # Redirect kora bhalo jate URL-ta clean thake
@@ -106,26 +186,25 @@ async def chat_reset(request: Request, session_id: str | None = Form(default=Non
     return resp
 @router.post("/chat/voice")
 async def chat_voice(request: Request, audio: UploadFile=File(...), mood: str|None=Form(default="default"), session_id: str|None=Form(default=None), language: str|None=Form(default="auto")):
-    ensure_dirs()
-    VOICE_DIR.mkdir(parents=True, exist_ok=True)
-    TTS_DIR.mkdir(parents=True, exist_ok=True)
     sid = _get_or_make_session_id(request, session_id)
-    session_file = CHAT_DIR / f"{sid}.json"
+    session_file = CHAT_DIR / f"{sid}.jsonl"
 
-    data = await audio.read()
     in_path = VOICE_DIR / f"{sid}_{uuid.uuid4().hex[:8]}.webm"
-    in_path.write_bytes(data)
 
     try:
-        transcript = stt_whispercpp(in_path, language=language)
+        # inside the try: a failed/aborted upload must not leave a partial file
+        await stream_upload_to_disk(audio, in_path)
+
+        # whisper, the chat call and piper all block: run them in worker threads
+        transcript = await asyncio.to_thread(stt_whispercpp, in_path, language=language)
         if not transcript:
             return JSONResponse({"ok": False, "error": "No speech detected."}, status_code=400)
 
-        r = chat_with_memory(session_file=session_file, user_text=transcript, mood=mood or "default", model="llama3.1:8b")
+        r = await asyncio.to_thread(chat_with_memory, session_file=session_file, user_text=transcript, mood=mood or "default", model="llama3.1:8b")
         
         audio_url = None
         try:
-            out_wav = tts_piper(r.reply, TTS_DIR / f"{sid}_{uuid.uuid4().hex[:8]}.wav")
+            out_wav = await asyncio.to_thread(tts_piper, r.reply, TTS_DIR / f"{sid}_{uuid.uuid4().hex[:8]}.wav")
             audio_url = f"/generated/chat_tts/{out_wav.name}"
         except Exception: pass 
 
@@ -133,6 +212,6 @@ async def chat_voice(request: Request, audio: UploadFile=File(...), mood: str|No
     except STTError as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
     finally:
-        if in_path.exists(): in_path.unlink()
+        in_path.unlink(missing_ok=True)
 
     
\ No newline at end of file
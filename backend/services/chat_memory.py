@@ -1,10 +1,25 @@
 from __future__ import annotations
 
-import json
+import sys
+import threading
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import orjson
+
+# Sessions are stored as JSONL (one {"role","content"} object per line) so a
+# new turn is a single append instead of a read + rewrite of the whole file.
+MAX_TURNS = 80
+COMPACT_AT_LINES = 2 * MAX_TURNS
+
+# Process-local cache of parsed sessions: path -> (mtime_ns, size, turns, lines).
+# A hit requires the file's stat to match, so edits from elsewhere are seen.
+CACHE_MAX_SESSIONS = 512
+_cache: OrderedDict[str, tuple[int, int, list["ChatTurn"], int]] = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 @dataclass
 class ChatTurn:
@@ -12,41 +27,159 @@ class ChatTurn:
     content: str
 
 
-def _safe_json_load(path: Path) -> Any:
+def _safe_jsonl_load(path: Path) -> list[Any]:
+    # one open() instead of exists() + read; a missing session is just empty
     try:
-        if not path.exists():
-            return None
-        return json.loads(path.read_text(encoding="utf-8"))
+        with open(path, "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
     except Exception:
+        return []
+    out: list[Any] = []
+    for line in lines:
+        try:
+            out.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            # torn/partial line (e.g. crash mid-append) -> skip it
+            continue
+    return out
+
+
+def _turn_from_obj(it: Any) -> ChatTurn | None:
+    if not isinstance(it, dict):
         return None
+    role = str(it.get("role") or "")
+    content = str(it.get("content") or "")
+    if role in ("user", "assistant") and content.strip():
+        # parsed strings are fresh objects; intern so every turn shares one
+        return ChatTurn(role=sys.intern(role), content=content.strip())
+    return None
 
 
-def load_history(session_file: Path) -> list[ChatTurn]:
-    obj = _safe_json_load(session_file)
-    if not isinstance(obj, dict):
-        return []
-    items = obj.get("messages")
-    if not isinstance(items, list):
-        return []
-    out: list[ChatTurn] = []
+def _dump_turn(t: ChatTurn) -> bytes:
+    return orjson.dumps({"role": t.role, "content": t.content}) + b"\n"
+
+
+def _cache_put(session_file: Path, mtime_ns: int, size: int, history: list[ChatTurn], lines: int) -> None:
+    # caller holds _cache_lock
+    key = str(session_file)
+    _cache[key] = (mtime_ns, size, history[-MAX_TURNS:], lines)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_SESSIONS:
+        _cache.popitem(last=False)
+
+
+def _tail(history: list[ChatTurn], limit: int) -> list[ChatTurn]:
+    # always a fresh list: callers may mutate it, the cache keeps its own
+    return history[-limit:] if limit > 0 else []
+
+
+def _parse_turns(items: list[Any]) -> list[ChatTurn]:
+    out: deque[ChatTurn] = deque(maxlen=MAX_TURNS)
     for it in items:
-        if isinstance(it, dict):
-            role = str(it.get("role") or "")
-            content = str(it.get("content") or "")
-            if role in ("user", "assistant") and content.strip():
-                out.append(ChatTurn(role=role, content=content.strip()))
-    return out
+        turn = _turn_from_obj(it)
+        if turn is not None:
+            out.append(turn)
+    return list(out)
+
+
+def _rewrite_locked(session_file: Path, history: list[ChatTurn]) -> None:
+    # caller holds _cache_lock, so no append can land between read and replace
+    tmp = session_file.with_suffix(session_file.suffix + ".tmp")
+    history = list(history[-MAX_TURNS:])
+    tmp.write_bytes(b"".join(_dump_turn(t) for t in history))
+    tmp.replace(session_file)
+    st = session_file.stat()
+    _cache_put(session_file, st.st_mtime_ns, st.st_size, history, len(history))
+
+
+def load_history(session_file: Path, limit: int = MAX_TURNS) -> list[ChatTurn]:
+    """Last `limit` turns of the session (at most MAX_TURNS are retained)."""
+    try:
+        st = session_file.stat()
+    except OSError:
+        return []
+
+    key = str(session_file)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            _cache.move_to_end(key)
+            return _tail(hit[2], limit)
+
+    items = _safe_jsonl_load(session_file)
+    if len(items) > COMPACT_AT_LINES:
+        # compaction: keep the file bounded once it has grown well past the
+        # limit. Re-read under the lock so a concurrent append is not lost.
+        with _cache_lock:
+            hist = _parse_turns(_safe_jsonl_load(session_file))
+            _rewrite_locked(session_file, hist)
+        return _tail(hist, limit)
+
+    hist = _parse_turns(items)
+    # keyed by the stat taken *before* reading: if the file changed
+    # meanwhile, the next stat will not match and we re-read
+    with _cache_lock:
+        _cache_put(session_file, st.st_mtime_ns, st.st_size, hist, len(items))
+    return _tail(hist, limit)
 
 
 def save_history(session_file: Path, history: list[ChatTurn]) -> None:
+    """Rewrite the whole session (last MAX_TURNS turns). Used for compaction."""
+    session_file.parent.mkdir(parents=True, exist_ok=True)
+    with _cache_lock:
+        _rewrite_locked(session_file, history)
+
+
+def extend_and_save(session_file: Path, new_turns: list[ChatTurn]) -> None:
+    """
+    Append several turns with one open + one write, and extend the cached
+    history in place (no re-read of the session).
+    """
+    turns = [ChatTurn(role=t.role, content=t.content.strip()) for t in new_turns]
+    if not turns:
+        return
     session_file.parent.mkdir(parents=True, exist_ok=True)
-    payload = {
-        "messages": [{"role": t.role, "content": t.content} for t in history][-80:]  # limit
-    }
-    session_file.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    data = b"".join(_dump_turn(t) for t in turns)
+    key = str(session_file)
+
+    with _cache_lock:
+        try:
+            before = session_file.stat()
+        except OSError:
+            before = None
+        with session_file.open("a+b") as f:
+            # a crash mid-append can leave a torn last line: start on a fresh
+            # line so the new turns are not glued onto it (and skipped on load)
+            if before is not None and before.st_size > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+        after = session_file.stat()
+
+        hit = _cache.get(key)
+        prev: list[ChatTurn] | None = None
+        prev_lines = 0
+        if before is None:
+            prev = []
+        elif hit is not None and hit[0] == before.st_mtime_ns and hit[1] == before.st_size:
+            prev, prev_lines = hit[2], hit[3]
+
+        # only extend the cached copy if nobody else appended in between
+        if prev is not None and after.st_size == (before.st_size if before else 0) + len(data):
+            history = prev + turns
+            lines = prev_lines + len(turns)
+            if lines <= COMPACT_AT_LINES:
+                _cache_put(session_file, after.st_mtime_ns, after.st_size, history, lines)
+            else:
+                # cache hits never re-read the file, so compaction has to
+                # happen here too (still under the lock)
+                _rewrite_locked(session_file, history)
+            return
+        _cache.pop(key, None)
 
 
 def append_turn(session_file: Path, role: str, content: str) -> None:
-    hist = load_history(session_file)
-    hist.append(ChatTurn(role=role, content=content.strip()))
-    save_history(session_file, hist)
+    extend_and_save(session_file, [ChatTurn(role=role, content=content)])
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import AsyncIterator
 
-from backend.services.ollama_client import ollama_chat, OllamaReply
-from backend.services.chat_memory import load_history, append_turn
+from backend.services.ollama_client import ollama_chat, ollama_chat_stream, OllamaReply
+from backend.services.chat_memory import ChatTurn, load_history, extend_and_save
+
+logger = logging.getLogger(__name__)
+
+# shared key/role strings for the per-turn message dicts
+_ROLE_KEY = sys.intern("role")
+_CONTENT_KEY = sys.intern("content")
+_SYSTEM = sys.intern("system")
+_USER = sys.intern("user")
 
 
 @dataclass
@@ -16,8 +29,11 @@ class ChatResult:
 
 
 def _system_prompt(mood: str) -> str:
-    mood = (mood or "default").strip().lower()
+    return _system_prompt_cached((mood or "default").strip().lower())
+
 
+@lru_cache(maxsize=16)
+def _system_prompt_cached(mood: str) -> str:
     base = (
         "You are EchoMind Chatbot. You are helpful, clear, and safe. "
         "Keep answers practical and structured. If user asks something unsafe, refuse politely. "
@@ -33,6 +49,18 @@ def _system_prompt(mood: str) -> str:
     return base
 
 
+def _build_messages(session_file: Path, user_text: str, mood: str, max_history_turns: int) -> list[dict]:
+    # load memory (last N turns)
+    hist = load_history(session_file, limit=max_history_turns)
+
+    messages: list[dict] = [{_ROLE_KEY: _SYSTEM, _CONTENT_KEY: _system_prompt(mood)}]
+    for t in hist:
+        messages.append({_ROLE_KEY: t.role, _CONTENT_KEY: t.content})
+
+    messages.append({_ROLE_KEY: _USER, _CONTENT_KEY: user_text})
+    return messages
+
+
 def chat_with_memory(
     *,
     session_file: Path,
@@ -45,22 +73,53 @@ def chat_with_memory(
     if not user_text:
         return ChatResult(ok=True, model=model, reply="Type something first 🙂")
 
-    # load memory
-    hist = load_history(session_file)
-    hist = hist[-max_history_turns:]  # last N turns
-
-    messages: list[dict] = [{"role": "system", "content": _system_prompt(mood)}]
-    for t in hist:
-        messages.append({"role": t.role, "content": t.content})
-
-    messages.append({"role": "user", "content": user_text})
+    messages = _build_messages(session_file, user_text, mood, max_history_turns)
 
     # call ollama
     r: OllamaReply = ollama_chat(model=model, messages=messages)
 
-    # update memory
-    append_turn(session_file, "user", user_text)
+    # update memory (single append for the whole turn)
+    new_turns = [ChatTurn(role="user", content=user_text)]
     if r.ok:
-        append_turn(session_file, "assistant", r.text)
+        new_turns.append(ChatTurn(role="assistant", content=r.text))
+    extend_and_save(session_file, new_turns)
 
     return ChatResult(ok=r.ok, model=r.model, reply=r.text, warning=r.warning)
+
+
+async def chat_stream_with_memory(
+    *,
+    session_file: Path,
+    user_text: str,
+    mood: str,
+    model: str = "llama3.1:8b",
+    max_history_turns: int = 16,
+) -> AsyncIterator[str]:
+    """
+    Same as chat_with_memory, but yields reply tokens as they arrive.
+    Memory is written once, when the stream ends (or is aborted).
+    """
+    user_text = (user_text or "").strip()
+    if not user_text:
+        yield "Type something first 🙂"
+        return
+
+    messages = _build_messages(session_file, user_text, mood, max_history_turns)
+
+    parts: list[str] = []
+    try:
+        async for token in ollama_chat_stream(model=model, messages=messages):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        logger.warning("Ollama stream failed: %s", e)
+        yield "(fallback) Ollama is unavailable."
+    finally:
+        # also runs when the SSE client disconnects (CancelledError /
+        # GeneratorExit): keep the user turn and whatever reply arrived.
+        # Shielded so a second cancel cannot drop the write.
+        reply = "".join(parts).strip()
+        new_turns = [ChatTurn(role="user", content=user_text)]
+        if reply:
+            new_turns.append(ChatTurn(role="assistant", content=reply))
+        await asyncio.shield(asyncio.to_thread(extend_and_save, session_file, new_turns))
@@ -1,21 +1,20 @@
 from __future__ import annotations
 
-import json
-import os
-import subprocess
 from pathlib import Path
 
+from backend.config import SETTINGS
 from backend.services.chatbot_memory import load_memory, save_memory
 from backend.services.chatbot_prompt import build_system_prompt
+from backend.services.ollama_client import ollama_chat_async
 
 CHAT_STORAGE = Path("backend/storage/chat_memory")
 CHAT_STORAGE.mkdir(parents=True, exist_ok=True)
 
-OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.1:8b")
-OLLAMA_TIMEOUT = int(os.environ.get("OLLAMA_TIMEOUT_SEC", "30"))
+OLLAMA_MODEL = SETTINGS.ollama_model
+OLLAMA_TIMEOUT = SETTINGS.ollama_timeout_sec or 30
 
 
-def run_chatbot(session_id: str, user_message: str, mood: str) -> dict:
+async def run_chatbot(session_id: str, user_message: str, mood: str) -> dict:
     """
     Offline Chatbot using Ollama.
     Safe, memory-based, ChatGPT-like.
@@ -28,20 +27,12 @@ def run_chatbot(session_id: str, user_message: str, mood: str) -> dict:
     messages.extend(history)
     messages.append({"role": "user", "content": user_message})
 
-    prompt = json.dumps(messages, ensure_ascii=False)
-
     try:
-        proc = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL, "-p", prompt],
-            capture_output=True,
-            text=True,
-            timeout=OLLAMA_TIMEOUT,
-        )
-
-        if proc.returncode != 0:
-            raise RuntimeError(proc.stderr)
+        r = await ollama_chat_async(model=OLLAMA_MODEL, messages=messages, timeout_s=OLLAMA_TIMEOUT)
+        if not r.ok:
+            raise RuntimeError(r.warning)
 
-        reply = proc.stdout.strip()
+        reply = r.text
 
         # Save memory
         history.append({"role": "user", "content": user_message})
@@ -1,3 +1,7 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=16)
 def build_system_prompt(mood: str) -> str:
     if mood == "tutor":
         return (
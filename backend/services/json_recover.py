@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+
+
+def loads_lenient(raw: str) -> Any:
+    """
+    Parse LLM output as JSON; if the model wrapped the object in prose or
+    markdown, retry on the slice between the first '{' and the last '}'.
+    Raises RuntimeError if neither parses.
+    """
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        first = raw.find("{")
+        last = raw.rfind("}")
+        if first != -1 and last > first:
+            try:
+                return orjson.loads(raw[first : last + 1])
+            except orjson.JSONDecodeError:
+                pass
+        raise RuntimeError(f"LLM output is not valid JSON. Raw:\n{raw}")
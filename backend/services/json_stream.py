@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+
+
+class JSONFieldStream:
+    """
+    Incremental parser for ONE top-level JSON object arriving in chunks
+    (e.g. streamed LLM tokens). feed() returns the (key, value) pairs whose
+    value has just closed, so callers can act on early fields (or abort)
+    before the model finishes. Each chunk is scanned once (brace depth +
+    in-string + escape state); only the pieces of the key/value currently
+    being captured are kept, and joined once when it closes.
+    Raises ValueError on malformed input.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._in_key = False    # capturing a top-level key string
+        self._in_value = False  # capturing a top-level value
+        self._pending: list[str] = []  # captured text from earlier chunks
+        self._key: str | None = None
+        self.fields: dict[str, Any] = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        if self.done:
+            return []
+        out: list[tuple[str, Any]] = []
+        # start of the open capture within this chunk (None: nothing captured)
+        cap = 0 if (self._in_key or self._in_value) else None
+
+        for i, ch in enumerate(chunk):
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._in_key:
+                        self._key = orjson.loads(self._take(chunk, cap, i + 1))
+                        self._in_key = False
+                        cap = None
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                elif not ch.isspace():
+                    raise ValueError(f"expected a JSON object, got {ch!r}")
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                if self._depth == 1 and not self._in_value:
+                    self._in_key = True
+                    cap = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_value(chunk, cap, i, out)
+                    self.done = True
+                    return out
+            elif self._depth == 1:
+                if ch == ":" and not self._in_value:
+                    if self._key is None:
+                        raise ValueError("object value without a key")
+                    self._in_value = True
+                    cap = i + 1
+                elif ch == ",":
+                    self._close_value(chunk, cap, i, out)
+                    cap = None
+
+        if cap is not None:
+            self._pending.append(chunk[cap:])
+        return out
+
+    def _take(self, chunk: str, cap: int | None, end: int) -> str:
+        text = "".join(self._pending) + chunk[cap or 0:end]
+        self._pending.clear()
+        return text
+
+    def _close_value(self, chunk: str, cap: int | None, end: int, out: list[tuple[str, Any]]) -> None:
+        if not self._in_value:
+            return  # empty object / trailing brace
+        value = orjson.loads(self._take(chunk, cap, end))
+        key = self._key or ""
+        self.fields[key] = value
+        out.append((key, value))
+        self._key = None
+        self._in_value = False
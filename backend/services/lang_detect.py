@@ -5,11 +5,19 @@ import re
 # Simple, explainable heuristic: if Bangla Unicode block dominates => bn else en
 BN_RE = re.compile(r"[\u0980-\u09FF]")
 
+# below this length a plain code-point scan beats regex engine setup
+_SHORT_HINT_LEN = 64
+
+def _count_bn_chars(s: str) -> int:
+    if len(s) < _SHORT_HINT_LEN:
+        return sum(1 for c in s if "\u0980" <= c <= "\u09FF")
+    return sum(1 for _ in BN_RE.finditer(s))
+
 def detect_language_from_text_hint(text_hint: str | None) -> str:
     if not text_hint:
         return "auto"
     s = text_hint.strip()
     if not s:
         return "auto"
-    bn_chars = len(BN_RE.findall(s))
+    bn_chars = _count_bn_chars(s)
     return "bn" if bn_chars >= max(3, len(s) // 10) else "en"
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, TypeVar
+
+from backend.config import LLM_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Same video / same transcript -> same prompt -> skip the whole LLM call.
+CACHE_TTL_SEC = 86400
+CACHE_SIZE_LIMIT = 500 * 1024 * 1024  # on-disk, bytes
+MEMORY_MAX_ENTRIES = 256
+
+_mem: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+_mem_lock = threading.Lock()
+
+_disk = None
+_disk_ready = False
+_disk_lock = threading.Lock()
+
+
+def _get_disk():
+    """Open the diskcache store once; None if diskcache is unavailable."""
+    global _disk, _disk_ready
+    if _disk_ready:
+        return _disk
+    with _disk_lock:
+        if not _disk_ready:
+            try:
+                import diskcache
+
+                _disk = diskcache.Cache(str(LLM_CACHE_DIR), size_limit=CACHE_SIZE_LIMIT)
+            except Exception as e:
+                logger.warning("LLM disk cache disabled (%s); using memory only.", e)
+                _disk = None
+            _disk_ready = True
+    return _disk
+
+
+def round_floats(obj: Any, ndigits: int = 3) -> Any:
+    """Round every float in a nested dict/list so near-identical stats share a key."""
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, dict):
+        return {k: round_floats(v, ndigits) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(v, ndigits) for v in obj]
+    return obj
+
+
+def make_key(key_material: dict[str, Any]) -> str:
+    raw = json.dumps(key_material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _mem_get(key: str) -> tuple[bool, Any]:
+    with _mem_lock:
+        hit = _mem.get(key)
+        if hit is None:
+            return False, None
+        if hit[0] < time.monotonic():
+            del _mem[key]
+            return False, None
+        _mem.move_to_end(key)
+        return True, hit[1]
+
+
+def _mem_put(key: str, value: Any) -> None:
+    with _mem_lock:
+        _mem[key] = (time.monotonic() + CACHE_TTL_SEC, value)
+        _mem.move_to_end(key)
+        while len(_mem) > MEMORY_MAX_ENTRIES:
+            _mem.popitem(last=False)
+
+
+def _lookup(key: str) -> tuple[bool, Any]:
+    found, value = _mem_get(key)
+    if found:
+        return True, value
+
+    disk = _get_disk()
+    if disk is not None:
+        try:
+            value = disk.get(key, default=None)
+        except Exception as e:
+            logger.warning("LLM disk cache read failed: %s", e)
+            value = None
+        if value is not None:
+            _mem_put(key, value)
+            return True, value
+    return False, None
+
+
+def _store(key: str, value: Any) -> None:
+    _mem_put(key, value)
+    disk = _get_disk()
+    if disk is not None:
+        try:
+            disk.set(key, value, expire=CACHE_TTL_SEC)
+        except Exception as e:
+            logger.warning("LLM disk cache write failed: %s", e)
+
+
+async def acached_llm_call(
+    key_material: dict[str, Any],
+    fn: Callable[[], Awaitable[T]],
+    *,
+    should_store: Callable[[T], bool] = lambda _r: True,
+) -> T:
+    """
+    Return a cached result for key_material (model + prompt + options),
+    else await fn() and store its result if should_store(result).
+    Exceptions from fn() propagate and are never cached.
+    """
+    key = make_key(key_material)
+    found, value = _lookup(key)
+    if found:
+        return value
+
+    value = await fn()
+    if should_store(value):
+        _store(key, value)
+    return value
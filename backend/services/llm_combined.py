@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable
+
+from backend.config import SETTINGS
+from backend.services.llm_cache import acached_llm_call, round_floats
+from backend.services.llm_motion_coach import (
+    LLMCoachResult,
+    coach_result_from_json,
+    coach_unavailable,
+    generate_motion_coach_feedback,
+    motion_coach_prompt_parts,
+)
+from backend.services.llm_social_context import (
+    LLMContextResult,
+    generate_social_context_explanation,
+    neutral_shortcut,
+    social_context_from_json,
+    social_context_prompt_parts,
+    social_context_unavailable,
+)
+from backend.services.ollama_client import ollama_chat_json_fields, ollama_options
+from backend.services.sentiment_bd import SentimentResult
+
+logger = logging.getLogger(__name__)
+
+
+def _pick_timeout_sec() -> int:
+    # one generation now covers both answers
+    return SETTINGS.ollama_timeout_sec or 150
+
+
+def build_combined_prompt(task1: tuple[str, str], task2: tuple[str, str]) -> str:
+    """
+    Batch prompt: both task specs behind one shared header, tagged with
+    [TASK n] so the answer can be split back by key.
+    task1/task2 are (static, dynamic) parts: ALL static text goes first and
+    the per-request inputs last, so Ollama reuses the KV cache for the whole
+    instruction prefix.
+    """
+    (static1, dynamic1), (static2, dynamic2) = task1, task2
+    return f"""
+You are an offline analyst. Complete TWO independent tasks below.
+Return STRICT JSON only, with exactly two top-level keys:
+{{"social_context": <answer to [TASK 1]>, "motion_coach": <answer to [TASK 2]>}}
+Each value must follow the JSON schema given inside its task.
+The inputs for both tasks come after both task descriptions.
+
+[TASK 1] social_context
+{static1}
+
+[TASK 2] motion_coach
+{static2}
+
+[INPUT for TASK 1]
+{dynamic1}
+
+[INPUT for TASK 2]
+{dynamic2}
+""".strip()
+
+
+_EXPECTED_KEYS = frozenset({"social_context", "motion_coach"})
+
+# on_result("social_context", LLMContextResult) / on_result("motion_coach", LLMCoachResult)
+ResultCallback = Callable[[str, Any], None]
+
+
+def _field_result(key: str, value: Any, model: str) -> LLMContextResult | LLMCoachResult:
+    if key == "social_context":
+        if isinstance(value, dict):
+            return social_context_from_json(value, model)
+        return social_context_unavailable(model, "Combined LLM output missing 'social_context'.")
+    if isinstance(value, dict):
+        return coach_result_from_json(value, model)
+    return coach_unavailable(model, "Combined LLM output missing 'motion_coach'.")
+
+
+async def generate_combined_feedback(
+    *,
+    transcript: str,
+    sent: SentimentResult,
+    language: str,
+    stats: dict[str, Any],
+    motion_explanation: dict[str, Any] | None,
+    on_result: ResultCallback | None = None,
+) -> tuple[LLMContextResult, LLMCoachResult]:
+    """
+    Social-context explanation + motion coach feedback from ONE /api/chat call.
+    Safe wrapper: NEVER throws. If one side has no input (or the social
+    context is trivially neutral), each runs through its own service.
+    on_result(key, result) fires once per side, as soon as that side is
+    known: while the answer streams in, or on return for cached/fallback
+    results.
+    """
+    emitted: set[str] = set()
+
+    def emit(key: str, result: LLMContextResult | LLMCoachResult) -> None:
+        if on_result is not None and key not in emitted:
+            emitted.add(key)
+            on_result(key, result)
+
+    results = await _combined_feedback(
+        transcript=transcript,
+        sent=sent,
+        language=language,
+        stats=stats,
+        motion_explanation=motion_explanation,
+        on_field=emit,
+    )
+    # cache hits and fallbacks never stream: report whatever is still missing
+    emit("social_context", results[0])
+    emit("motion_coach", results[1])
+    return results
+
+
+async def _combined_feedback(
+    *,
+    transcript: str,
+    sent: SentimentResult,
+    language: str,
+    stats: dict[str, Any],
+    motion_explanation: dict[str, Any] | None,
+    on_field: ResultCallback,
+) -> tuple[LLMContextResult, LLMCoachResult]:
+    model = SETTINGS.ollama_model
+    transcript = (transcript or "").strip()
+    # summarize_timeline always returns a dict: no frames -> count == 0
+    has_stats = isinstance(stats, dict) and bool(stats.get("count"))
+
+    social_kwargs = dict(
+        text=transcript,
+        sentiment_label=sent.label,
+        sentiment_score=sent.score,
+        matched_positive=sent.matched_positive,
+        matched_negative=sent.matched_negative,
+        language=language,
+    )
+    trivial_social = neutral_shortcut(
+        text=transcript,
+        sentiment_label=sent.label,
+        matched_positive=sent.matched_positive,
+        matched_negative=sent.matched_negative,
+    )
+    if not transcript or not has_stats or trivial_social is not None:
+        # nothing to batch: each service handles its own empty/trivial input
+        return tuple(await asyncio.gather(
+            generate_social_context_explanation(**social_kwargs),
+            generate_motion_coach_feedback(stats=stats, motion_explanation=motion_explanation),
+        ))
+
+    # rounded stats: trivially different averages reuse the cached reply
+    prompt = build_combined_prompt(
+        social_context_prompt_parts(**social_kwargs),
+        motion_coach_prompt_parts(stats=round_floats(stats), motion_explanation=motion_explanation),
+    )
+    timeout_sec = _pick_timeout_sec()
+    # full JSON answer for both tasks (num_ctx comes from ollama_options)
+    options = ollama_options({"num_predict": -1})
+
+    return await acached_llm_call(
+        {"model": model, "prompt": prompt, "opts": {**options, "format": "json"}},
+        lambda: _call_combined(prompt, model=model, timeout_sec=timeout_sec, options=options, on_field=on_field),
+        should_store=lambda r: r[0].ok and r[1].ok,
+    )
+
+
+async def _call_combined(
+    prompt: str,
+    *,
+    model: str,
+    timeout_sec: int,
+    options: dict[str, Any],
+    on_field: ResultCallback,
+) -> tuple[LLMContextResult, LLMCoachResult]:
+    logger.info("Ollama combined call: model=%s timeout=%ss", model, timeout_sec)
+
+    def field_closed(key: str, value: Any) -> None:
+        if key in _EXPECTED_KEYS:
+            on_field(key, _field_result(key, value, model))
+
+    # streamed + parsed as generated; a wrong first key aborts early
+    try:
+        data = await ollama_chat_json_fields(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout_s=timeout_sec,
+            options=options,
+            keep_alive="30m",
+            expected_keys=_EXPECTED_KEYS,
+            on_field=field_closed,
+        )
+    except Exception as e:  # TimeoutError / RuntimeError, message says which
+        return social_context_unavailable(model, str(e)), coach_unavailable(model, str(e))
+
+    return (
+        _field_result("social_context", data.get("social_context"), model),
+        _field_result("motion_coach", data.get("motion_coach"), model),
+    )
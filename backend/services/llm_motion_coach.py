@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-import json
 import logging
-import os
-import subprocess
 from dataclasses import dataclass
 from typing import Any
 
+import orjson
+
+from backend.config import SETTINGS
+from backend.services.json_recover import loads_lenient
+from backend.services.llm_cache import acached_llm_call, round_floats
+from backend.services.ollama_client import ollama_chat_async, ollama_options
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,47 +25,21 @@ class LLMCoachResult:
 
 def _pick_model_name() -> str:
     # You already use llama3.1:8b (keep it)
-    return os.environ.get("OLLAMA_MODEL", "llama3.1:8b")
+    return SETTINGS.ollama_model
 
 
 def _pick_timeout_sec() -> int:
     # Phase-2 coach prompt can be a bit heavier; give more time
-    try:
-        return int(os.environ.get("OLLAMA_TIMEOUT_SEC", "60"))
-    except Exception:
-        return 60
-
-
-def build_motion_coach_prompt(
-    *,
-    stats: dict[str, Any],
-    motion_explanation: dict[str, Any] | None,
-) -> str:
-    """
-    Bangladesh-context, explainable coaching feedback.
-    Returns STRICT JSON only.
-    Keeps it short so llama3.1:8b finishes faster.
-    """
-
-    # Keep only important fields to reduce tokens
-    compact = {
-        "averages": stats.get("averages", {}),
-        "variability": stats.get("variability", {}),
-        "levels": stats.get("levels", {}),
-        "count": stats.get("count", None),
-    }
+    return SETTINGS.ollama_timeout_sec or 60
 
-    limitations = []
-    if isinstance(motion_explanation, dict):
-        lim = motion_explanation.get("limitations")
-        if isinstance(lim, list):
-            limitations = lim[:6]
 
-    return f"""
+# Instructions + schema, identical on every call: goes before the stats so
+# Ollama can reuse the KV cache for this prefix.
+_STATIC_HEADER = """
 You are an "AI Presentation Coach" for Bangladesh context.
 You analyze motion features (NOT personal identity). You must be respectful, non-judgmental, and actionable.
 
-Given:
+Given (see "Input JSON" and "Known limitations" below):
 - feature averages (0..1)
 - feature variability (0..1)
 - levels labels
@@ -74,68 +52,155 @@ Your task:
 4) Mention limitations clearly (approx eye-contact, camera angle, lighting).
 5) Output STRICT JSON only.
 
-Input JSON:
-{json.dumps(compact, ensure_ascii=False)}
-
-Known limitations:
-{json.dumps(limitations, ensure_ascii=False)}
-
 Return STRICT JSON ONLY:
-{{
+{
   "overall_rating": "A|B|C",
   "summary": "2-4 sentences",
-  "insights": {{
+  "insights": {
     "posture_openness": "1-2 sentences",
     "hand_gesture_activity": "1-2 sentences",
     "movement_pacing": "1-2 sentences",
     "eye_contact_approx": "1-2 sentences (must say approximation)"
-  }},
+  },
   "tips": ["tip1", "tip2", "tip3"],
   "limitations": ["lim1", "lim2"],
   "disclaimer": "This is an approximation and not a medical or legal judgment."
-}}
+}
 """.strip()
 
 
-def _ollama_run(prompt: str, model: str, timeout_sec: int) -> str:
+def motion_coach_prompt_parts(
+    *,
+    stats: dict[str, Any],
+    motion_explanation: dict[str, Any] | None,
+) -> tuple[str, str]:
+    """(static instructions, per-request input): callers put the static part first."""
+    # Keep only important fields to reduce tokens
+    compact = {
+        "averages": stats.get("averages", {}),
+        "variability": stats.get("variability", {}),
+        "levels": stats.get("levels", {}),
+        "count": stats.get("count", None),
+    }
+
+    limitations = []
+    if isinstance(motion_explanation, dict):
+        lim = motion_explanation.get("limitations")
+        if isinstance(lim, list):
+            limitations = lim[:6]
+
+    dynamic = f"""
+Input JSON:
+{orjson.dumps(compact).decode()}
+
+Known limitations:
+{orjson.dumps(limitations).decode()}
+""".strip()
+    return _STATIC_HEADER, dynamic
+
+
+def build_motion_coach_prompt(
+    *,
+    stats: dict[str, Any],
+    motion_explanation: dict[str, Any] | None,
+) -> str:
     """
-    IMPORTANT FIX:
-    Your Ollama CLI version showed: unknown shorthand flag '-p'
-    So we DO NOT use -p.
-    We pass the prompt as a normal argument.
+    Bangladesh-context, explainable coaching feedback.
+    Returns STRICT JSON only.
+    Keeps it short so llama3.1:8b finishes faster.
     """
-    cmd = ["ollama", "run", model, prompt]
+    static, dynamic = motion_coach_prompt_parts(stats=stats, motion_explanation=motion_explanation)
+    return static + "\n\n" + dynamic
 
-    logger.info("Ollama motion-coach call: model=%s timeout=%ss", model, timeout_sec)
 
-    proc = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        timeout=timeout_sec,
-    )
+# the CLI path never capped generation; keep the full JSON answer
+_LLM_OPTIONS = ollama_options({"num_predict": -1})
 
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        stdout = (proc.stdout or "").strip()
-        raise RuntimeError(f"Ollama failed (code={proc.returncode}). stderr={stderr} stdout={stdout}")
 
-    return (proc.stdout or "").strip()
+async def _ollama_run_async(prompt: str, model: str, timeout_sec: int) -> str:
+    """
+    Calls the local Ollama HTTP API on the shared keep-alive client
+    (no `ollama run` process per call; the model stays resident).
+    """
+    logger.info("Ollama motion-coach call: model=%s timeout=%ss", model, timeout_sec)
 
+    r = await ollama_chat_async(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        timeout_s=timeout_sec,
+        options=_LLM_OPTIONS,
+    )
+    if not r.ok:
+        raise RuntimeError(r.warning or "Ollama call failed.")
+    return r.text
+
+
+async def _ollama_json_async(prompt: str, model: str, timeout_sec: int) -> Any:
+    return loads_lenient(await _ollama_run_async(prompt, model=model, timeout_sec=timeout_sec))
+
+
+def coach_result_from_json(data: dict[str, Any], model: str) -> LLMCoachResult:
+    """Turn the model's JSON answer into the UI-facing result."""
+    # Build readable feedback for UI
+    rating = str(data.get("overall_rating", "")).strip()
+    summary = str(data.get("summary", "")).strip()
+    insights = data.get("insights", {}) if isinstance(data.get("insights", {}), dict) else {}
+    tips = data.get("tips", []) if isinstance(data.get("tips", []), list) else []
+    lims = data.get("limitations", []) if isinstance(data.get("limitations", []), list) else []
+    disclaimer = str(data.get("disclaimer", "")).strip()
+
+    parts: list[str] = []
+    if rating:
+        parts.append(f"Overall Rating: {rating}")
+        parts.append("")
+    if summary:
+        parts.append("Summary:")
+        parts.append(summary)
+        parts.append("")
+
+    if insights:
+        parts.append("Key Insights:")
+        for k in ("posture_openness", "hand_gesture_activity", "movement_pacing", "eye_contact_approx"):
+            if k in insights:
+                parts.append(f"- {k.replace('_',' ').title()}: {str(insights[k]).strip()}")
+        parts.append("")
+
+    if tips:
+        parts.append("Actionable Tips:")
+        for t in tips[:8]:
+            parts.append(f"- {str(t).strip()}")
+        parts.append("")
+
+    if lims:
+        parts.append("Limitations:")
+        for l in lims[:8]:
+            parts.append(f"- {str(l).strip()}")
+        parts.append("")
+
+    if disclaimer:
+        parts.append("Disclaimer:")
+        parts.append(disclaimer)
+
+    return LLMCoachResult(
+        ok=True,
+        model=model,
+        feedback="\n".join(parts).strip(),
+        json_data=data if isinstance(data, dict) else {},
+        warning=None,
+    )
 
-def _parse_json_strict(raw: str) -> dict[str, Any]:
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        # recover by finding first/last braces
-        first = raw.find("{")
-        last = raw.rfind("}")
-        if first != -1 and last != -1 and last > first:
-            return json.loads(raw[first : last + 1])
-        raise RuntimeError(f"LLM output is not valid JSON. Raw:\n{raw}")
 
+def coach_unavailable(model: str, warning: str) -> LLMCoachResult:
+    return LLMCoachResult(
+        ok=False,
+        model=model,
+        feedback="LLM coach unavailable. Showing rule-based Phase-2 metrics only.",
+        json_data={},
+        warning=warning,
+    )
 
-def generate_motion_coach_feedback(
+
+async def generate_motion_coach_feedback(
     *,
     stats: dict[str, Any],
     motion_explanation: dict[str, Any] | None,
@@ -146,8 +211,8 @@ def generate_motion_coach_feedback(
     model = _pick_model_name()
     timeout_sec = _pick_timeout_sec()
 
-    # Guard
-    if not isinstance(stats, dict) or not stats:
+    # Guard (summarize_timeline reports count == 0 when no frame was read)
+    if not isinstance(stats, dict) or not stats.get("count"):
         return LLMCoachResult(
             ok=False,
             model=model,
@@ -156,73 +221,17 @@ def generate_motion_coach_feedback(
             warning="Empty stats input.",
         )
 
-    prompt = build_motion_coach_prompt(stats=stats, motion_explanation=motion_explanation)
+    # rounded stats: trivially different averages reuse the cached reply
+    prompt = build_motion_coach_prompt(stats=round_floats(stats), motion_explanation=motion_explanation)
 
     try:
-        raw = _ollama_run(prompt, model=model, timeout_sec=timeout_sec)
-        data = _parse_json_strict(raw)
-
-        # Build readable feedback for UI
-        rating = str(data.get("overall_rating", "")).strip()
-        summary = str(data.get("summary", "")).strip()
-        insights = data.get("insights", {}) if isinstance(data.get("insights", {}), dict) else {}
-        tips = data.get("tips", []) if isinstance(data.get("tips", []), list) else []
-        lims = data.get("limitations", []) if isinstance(data.get("limitations", []), list) else []
-        disclaimer = str(data.get("disclaimer", "")).strip()
-
-        parts: list[str] = []
-        if rating:
-            parts.append(f"Overall Rating: {rating}")
-            parts.append("")
-        if summary:
-            parts.append("Summary:")
-            parts.append(summary)
-            parts.append("")
-
-        if insights:
-            parts.append("Key Insights:")
-            for k in ("posture_openness", "hand_gesture_activity", "movement_pacing", "eye_contact_approx"):
-                if k in insights:
-                    parts.append(f"- {k.replace('_',' ').title()}: {str(insights[k]).strip()}")
-            parts.append("")
-
-        if tips:
-            parts.append("Actionable Tips:")
-            for t in tips[:8]:
-                parts.append(f"- {str(t).strip()}")
-            parts.append("")
-
-        if lims:
-            parts.append("Limitations:")
-            for l in lims[:8]:
-                parts.append(f"- {str(l).strip()}")
-            parts.append("")
-
-        if disclaimer:
-            parts.append("Disclaimer:")
-            parts.append(disclaimer)
-
-        return LLMCoachResult(
-            ok=True,
-            model=model,
-            feedback="\n".join(parts).strip(),
-            json_data=data if isinstance(data, dict) else {},
-            warning=None,
+        # parsed before caching: an unreadable answer raises and is not stored
+        data = await acached_llm_call(
+            {"model": model, "prompt": prompt, "opts": _LLM_OPTIONS},
+            lambda: _ollama_json_async(prompt, model=model, timeout_sec=timeout_sec),
         )
 
-    except subprocess.TimeoutExpired:
-        return LLMCoachResult(
-            ok=False,
-            model=model,
-            feedback="LLM coach timed out. Showing rule-based Phase-2 metrics only.",
-            json_data={},
-            warning=f"Ollama timeout after {timeout_sec}s.",
-        )
+        return coach_result_from_json(data, model)
+
     except Exception as e:
-        return LLMCoachResult(
-            ok=False,
-            model=model,
-            feedback="LLM coach unavailable. Showing rule-based Phase-2 metrics only.",
-            json_data={},
-            warning=str(e),
-        )
+        return coach_unavailable(model, str(e))
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import json
 import logging
-import os
-import subprocess
 from dataclasses import dataclass
 from typing import Any
 
+from backend.config import SETTINGS
+from backend.services.llm_cache import acached_llm_call
+from backend.services.ollama_client import ollama_chat_json_fields, ollama_options
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,17 +26,14 @@ def _pick_model_name() -> str:
     You can set:
       export OLLAMA_MODEL=llama3.1:8b
     """
-    return os.environ.get("OLLAMA_MODEL", "llama3.1:8b")
+    return SETTINGS.ollama_model
 
 
 def _pick_timeout_sec() -> int:
     """
     Timeout for LLM call so your pipeline never hangs.
     """
-    try:
-        return int(os.environ.get("OLLAMA_TIMEOUT_SEC", "90"))
-    except Exception:
-        return 90
+    return SETTINGS.ollama_timeout_sec or 90
 
 
 def _interpret_score_bucket(score: float) -> str:
@@ -49,6 +47,49 @@ def _interpret_score_bucket(score: float) -> str:
     return "neutral/mixed"
 
 
+# Static instructions + schema, sent verbatim first so Ollama can reuse the
+# KV cache for this prefix; the per-request text/score go after it.
+_STATIC_HEADER = """
+You analyze Bangladesh social context and International Context.You are an AI "Social Context & Responsible Language" analyst for Bangladesh and out world country.
+You MUST be neutral, professional, and educational.
+Return STRICT JSON only.
+Your job:
+1) Explain WHY the given sentiment score looks the way it does (see "Score bucket" below).
+2) Identify slang/offensive/inappropriate wording (if any).
+3) Explain using Bangladesh social norms and acceptable public discourse.
+4) Provide a safe, non-legal disclaimer: "This is NOT legal advice."
+5) DO NOT change the sentiment label or score.
+6) Do NOT claim exact law section numbers; use general references only.
+
+JSON schema:
+{
+ "score_interpretation":"1 sentence",
+ "social_context_analysis":"2-4 sentences",
+ "flags":{"has_slang_or_offensive":true/false,"example_terms":[],"risk_level":"low|medium|high"},
+ 
+}
+""".strip()
+
+
+def social_context_prompt_parts(
+    *,
+    text: str,
+    sentiment_label: str,
+    sentiment_score: float,
+    matched_positive: list[str],
+    matched_negative: list[str],
+    language: str,
+) -> tuple[str, str]:
+    """(static instructions, per-request input): callers put the static part first."""
+    score_bucket = _interpret_score_bucket(sentiment_score)
+    dynamic = f"""
+Text: \"\"\"{text}\"\"\"
+Sentiment: {sentiment_label}  Score: {sentiment_score:.2f}
+Score bucket: {score_bucket}
+""".strip()
+    return _STATIC_HEADER, dynamic
+
+
 def build_social_context_prompt(
     *,
     text: str,
@@ -63,81 +104,116 @@ def build_social_context_prompt(
     It must NOT change label/score; only justify and add context.
     Output is strict JSON to avoid frontend parsing issues.
     """
+    static, dynamic = social_context_prompt_parts(
+        text=text,
+        sentiment_label=sentiment_label,
+        sentiment_score=sentiment_score,
+        matched_positive=matched_positive,
+        matched_negative=matched_negative,
+        language=language,
+    )
+    return static + "\n\n" + dynamic
 
-    score_bucket = _interpret_score_bucket(sentiment_score)
-    return f"""
-You analyze Bangladesh social context and International Context.You are an AI "Social Context & Responsible Language" analyst for Bangladesh and out world country.
-You MUST be neutral, professional, and educational.
-Return STRICT JSON only.
-Your job:
-1) Explain WHY the given sentiment score looks {score_bucket}.
-2) Identify slang/offensive/inappropriate wording (if any).
-3) Explain using Bangladesh social norms and acceptable public discourse.
-4) Provide a safe, non-legal disclaimer: "This is NOT legal advice."
-5) DO NOT change the sentiment label or score.
-6) Do NOT claim exact law section numbers; use general references only.
 
-Text: \"\"\"{text}\"\"\"
-Sentiment: {sentiment_label}  Score: {sentiment_score:.2f}
+_LLM_OPTIONS = ollama_options({"num_predict": 450})
 
-JSON schema:
-{{
- "score_interpretation":"1 sentence",
- "social_context_analysis":"2-4 sentences",
- "flags":{{"has_slang_or_offensive":true/false,"example_terms":[],"risk_level":"low|medium|high"}},
- 
-}}
-""".strip()
+
+# top-level keys the prompt asks for; anything else first => abort early
+_EXPECTED_KEYS = frozenset({
+    "score_interpretation", "social_context_analysis", "flags",
+    "bangladesh_context_reference", "limitation_note", "disclaimer",
+})
 
 
-def ollama_generate_json(prompt: str, model: str, timeout_sec: int) -> dict[str, Any]:
+async def ollama_generate_json(
+    prompt: str,
+    model: str,
+    timeout_sec: int,
+) -> dict[str, Any]:
     """
-    Calls Ollama locally via CLI (no network, no API key).
-    IMPORTANT FIX:
-      - DO NOT use '-p' flag (your ollama version doesn't support it)
-      - Send prompt via STDIN instead.
+    Calls the local Ollama HTTP API on the shared async client
+    (no network, no API key; the event loop is never blocked).
+    The JSON answer is streamed and parsed as it arrives (a wrong first key
+    aborts the generation early). keep_alive keeps the model loaded.
     """
+    logger.info("Ollama call: model=%s timeout=%ss", model, timeout_sec)
 
-    cmd = ["ollama", "run", model]
+    return await ollama_chat_json_fields(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        timeout_s=timeout_sec,
+        options=_LLM_OPTIONS,
+        keep_alive="30m",
+        expected_keys=_EXPECTED_KEYS,
+    )
 
-    logger.info("Ollama call: model=%s timeout=%ss", model, timeout_sec)
 
-    try:
-      proc = subprocess.run(
-    cmd,
-    input=prompt,
-    capture_output=True,
-    text=True,
-    timeout=timeout_sec,
-    env={**os.environ, "OLLAMA_NUM_CTX": "1024"}  # ✅ smaller context = faster
-)
-
-    except FileNotFoundError as e:
-        raise RuntimeError("Ollama CLI not found. Install Ollama and ensure 'ollama' is in PATH.") from e
-
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        stdout = (proc.stdout or "").strip()
-        raise RuntimeError(f"Ollama failed (code={proc.returncode}). stderr={stderr} stdout={stdout}")
-
-    raw = (proc.stdout or "").strip()
-
-    # Try JSON parse
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        # Recover by finding first/last braces
-        first = raw.find("{")
-        last = raw.rfind("}")
-        if first != -1 and last != -1 and last > first:
-            try:
-                return json.loads(raw[first:last + 1])
-            except Exception:
-                pass
-        raise RuntimeError(f"Ollama output is not valid JSON. Raw output:\n{raw}")
-
-
-def generate_social_context_explanation(
+def social_context_from_json(data: dict[str, Any], model: str) -> LLMContextResult:
+    """Turn the model's JSON answer into the UI-facing result."""
+    score_interp = str(data.get("score_interpretation", "")).strip()
+    social_ctx = str(data.get("social_context_analysis", "")).strip()
+    bd_ref = str(data.get("bangladesh_context_reference", "")).strip()
+    limitation = str(data.get("limitation_note", "")).strip()
+    disclaimer = str(data.get("disclaimer", "This is NOT legal advice.")).strip()
+    flags = data.get("flags", {}) if isinstance(data.get("flags", {}), dict) else {}
+
+    explanation_parts: list[str] = []
+
+    if score_interp:
+        explanation_parts += ["Score Interpretation:", score_interp, ""]
+    if social_ctx:
+        explanation_parts += ["Social Context Analysis:", social_ctx, ""]
+    if bd_ref:
+        explanation_parts += ["Bangladesh Context Reference:", bd_ref, ""]
+    if limitation:
+        explanation_parts += ["Limitation Note:", limitation, ""]
+
+    explanation_parts += ["Disclaimer:", disclaimer]
+
+    return LLMContextResult(
+        ok=True,
+        model=model,
+        explanation="\n".join(explanation_parts).strip(),
+        flags=flags,
+        warning=None,
+    )
+
+
+def neutral_shortcut(
+    *,
+    text: str,
+    sentiment_label: str,
+    matched_positive: list[str],
+    matched_negative: list[str],
+) -> LLMContextResult | None:
+    """
+    Short neutral text with no matched terms: the answer is fixed, so skip
+    the LLM entirely. Returns None when the LLM is actually needed.
+    """
+    if sentiment_label != "neutral" or matched_positive or matched_negative:
+        return None
+    if len(text.split()) >= 8:
+        return None
+    return LLMContextResult(
+        ok=True,
+        model="rule-based",
+        explanation="Neutral content; no strong sentiment or flagged terms detected.",
+        flags={"has_slang_or_offensive": False, "example_terms": [], "risk_level": "low"},
+        warning=None,
+    )
+
+
+def social_context_unavailable(model: str, warning: str) -> LLMContextResult:
+    return LLMContextResult(
+        ok=False,
+        model=model,
+        explanation="LLM social-context analysis unavailable. Showing rule-based explanation only.",
+        flags={"has_slang_or_offensive": False, "example_terms": [], "tone": "mixed", "risk_level": "medium"},
+        warning=warning,
+    )
+
+
+async def generate_social_context_explanation(
     *,
     text: str,
     sentiment_label: str,
@@ -163,6 +239,15 @@ def generate_social_context_explanation(
             warning="Empty text. Skipping LLM social context analysis.",
         )
 
+    shortcut = neutral_shortcut(
+        text=text,
+        sentiment_label=sentiment_label,
+        matched_positive=matched_positive,
+        matched_negative=matched_negative,
+    )
+    if shortcut is not None:
+        return shortcut
+
     prompt = build_social_context_prompt(
         text=text,
         sentiment_label=sentiment_label,
@@ -173,37 +258,15 @@ def generate_social_context_explanation(
     )
 
     try:
-        data = ollama_generate_json(prompt, model=model, timeout_sec=timeout_sec)
-
-        score_interp = str(data.get("score_interpretation", "")).strip()
-        social_ctx = str(data.get("social_context_analysis", "")).strip()
-        bd_ref = str(data.get("bangladesh_context_reference", "")).strip()
-        limitation = str(data.get("limitation_note", "")).strip()
-        disclaimer = str(data.get("disclaimer", "This is NOT legal advice.")).strip()
-        flags = data.get("flags", {}) if isinstance(data.get("flags", {}), dict) else {}
-
-        explanation_parts: list[str] = []
-
-        if score_interp:
-            explanation_parts += ["Score Interpretation:", score_interp, ""]
-        if social_ctx:
-            explanation_parts += ["Social Context Analysis:", social_ctx, ""]
-        if bd_ref:
-            explanation_parts += ["Bangladesh Context Reference:", bd_ref, ""]
-        if limitation:
-            explanation_parts += ["Limitation Note:", limitation, ""]
-
-        explanation_parts += ["Disclaimer:", disclaimer]
-
-        return LLMContextResult(
-            ok=True,
-            model=model,
-            explanation="\n".join(explanation_parts).strip(),
-            flags=flags,
-            warning=None,
+        # same transcript -> same prompt: served from the LLM response cache
+        data = await acached_llm_call(
+            {"model": model, "prompt": prompt, "opts": {**_LLM_OPTIONS, "format": "json"}},
+            lambda: ollama_generate_json(prompt, model=model, timeout_sec=timeout_sec),
         )
 
-    except subprocess.TimeoutExpired:
+        return social_context_from_json(data, model)
+
+    except TimeoutError:
         return LLMContextResult(
             ok=False,
             model=model,
@@ -212,10 +275,4 @@ def generate_social_context_explanation(
             warning=f"Ollama timeout after {timeout_sec}s.",
         )
     except Exception as e:
-        return LLMContextResult(
-            ok=False,
-            model=model,
-            explanation="LLM social-context analysis unavailable. Showing rule-based explanation only.",
-            flags={"has_slang_or_offensive": False, "example_terms": [], "tone": "mixed", "risk_level": "medium"},
-            warning=str(e),
-        )
+        return social_context_unavailable(model, str(e))
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
-import json
-import math
+import atexit
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
+from typing import IO
 
 import cv2
 import numpy as np
 import mediapipe as mp
+import orjson
 
 from backend.config import FRAME_SAMPLE_FPS
 
+# MediaPipe runs its own worker threads; keep OpenCV single-threaded so the
+# reader thread + three model threads do not oversubscribe the CPU.
+cv2.setNumThreads(1)
+
+# sampled RGB frames decoded ahead of the MediaPipe stage
+FRAME_QUEUE_SIZE = 4
+
+FEATURE_NAMES = ("posture_openness", "hand_gesture_activity", "eye_contact_approx", "movement_pacing")
+
 @dataclass
 class FrameFeature:
     t_sec: float
@@ -19,17 +32,127 @@ class FrameFeature:
     eye_contact_approx: float
     movement_pacing: float
 
-def _dist(a: tuple[float, float], b: tuple[float, float]) -> float:
-    return float(math.hypot(a[0] - b[0], a[1] - b[1]))
+# Pose landmarks we use, gathered into one (7, 2) array per frame.
+# Rows: 0 L_SHO, 1 R_SHO, 2 L_ELB, 3 R_ELB, 4 L_HIP, 5 R_HIP, 6 NOSE
+POSE_IDS = (11, 12, 13, 14, 23, 24, 0)
+_PAIR_A = np.array([0, 2, 4])   # left shoulder / elbow / hip
+_PAIR_B = np.array([1, 3, 5])   # right shoulder / elbow / hip
+_TORSO = np.array([0, 1, 4, 5])
+_NOSE = 6
+_FRAME_CENTER = np.array([0.5, 0.45], dtype=np.float32)
+
+def _hand_points(multi_hand_landmarks) -> np.ndarray:
+    """All hand landmarks of a frame as one (N, 2) float32 array."""
+    lms = [p for hand_lms in multi_hand_landmarks for p in hand_lms.landmark]
+    flat = np.fromiter((v for p in lms for v in (p.x, p.y)), dtype=np.float32, count=2 * len(lms))
+    return flat.reshape(-1, 2)
+
+# MediaPipe graphs are expensive to build (TFLite load + delegate init), so
+# Pose/Hands/FaceMesh sets are kept and reused across videos. A set is not
+# thread-safe: each analyze_motion call checks one out for its whole run,
+# and concurrent calls get their own set.
+_solutions_lock = threading.Lock()
+_idle_solutions: list[tuple] = []
+_all_solutions: list[tuple] = []
+
+def _new_solutions() -> tuple:
+    return (
+        mp.solutions.pose.Pose(static_image_mode=False, model_complexity=1, enable_segmentation=False),
+        mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0),
+        mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=False),
+    )
+
+def _acquire_solutions() -> tuple:
+    with _solutions_lock:
+        if _idle_solutions:
+            return _idle_solutions.pop()
+    solutions = _new_solutions()
+    with _solutions_lock:
+        _all_solutions.append(solutions)
+    return solutions
+
+def _release_solutions(solutions: tuple) -> None:
+    # video mode keeps tracking ROIs + landmark smoothing between frames:
+    # reset the graphs so the next video starts exactly like a fresh set
+    try:
+        for s in solutions:
+            s.reset()
+    except Exception:
+        with _solutions_lock:
+            _all_solutions.remove(solutions)
+        for s in solutions:
+            s.close()
+        return
+    with _solutions_lock:
+        _idle_solutions.append(solutions)
+
+# Pose / Hands / FaceMesh of a frame run in parallel (they release the GIL
+# in native code). One process-wide pool, like the solution sets above;
+# concurrent videos share its workers.
+_MODEL_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix="mediapipe")
+
+@atexit.register
+def _close_solutions() -> None:
+    with _solutions_lock:
+        for solutions in _all_solutions:
+            for s in solutions:
+                s.close()
+        _all_solutions.clear()
+        _idle_solutions.clear()
+
+def _put(out: queue.Queue, item, stop: threading.Event) -> None:
+    # blocking put that gives up once the consumer has stopped
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
 
-def _clip01(x: float) -> float:
-    return max(0.0, min(1.0, x))
+def _read_sampled_frames(cap, sample_every: int, out: queue.Queue, stop: threading.Event) -> None:
+    """
+    Reader thread: keep every sample_every-th frame as RGB and queue
+    (frame_idx, rgb). Ends with None; a decode error is queued as-is.
+    Skipped frames are only grab()bed: no retrieve() into a BGR Mat and
+    no colour conversion. Seeking with CAP_PROP_POS_FRAMES is avoided on
+    purpose: it is slow and frame-inexact between keyframes.
+
+    Frames are decoded into one reused BGR buffer and converted into a ring
+    of RGB buffers (dst=), so the loop does not allocate per frame. The ring
+    has FRAME_QUEUE_SIZE + 2 slots: up to FRAME_QUEUE_SIZE queued, one being
+    processed by the consumer and one being written here, so a slot is never
+    overwritten while still in use.
+    """
+    frame_idx = 0
+    bgr = None
+    ring: list[np.ndarray] = []
+    slot = 0
+    try:
+        while not stop.is_set():
+            if not cap.grab():
+                break
+            if frame_idx % sample_every == 0:
+                ok, bgr = cap.retrieve(bgr)
+                if not ok:
+                    break
+                if not ring or ring[0].shape != bgr.shape:
+                    ring = [np.empty_like(bgr) for _ in range(FRAME_QUEUE_SIZE + 2)]
+                rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=ring[slot])
+                slot = (slot + 1) % len(ring)
+                _put(out, (frame_idx, rgb), stop)
+            frame_idx += 1
+    except Exception as e:
+        _put(out, e, stop)
+    finally:
+        _put(out, None, stop)
 
-def analyze_motion(video_path: Path) -> tuple[list[FrameFeature], dict]:
+def analyze_motion(video_path: Path) -> tuple[list[FrameFeature], dict, np.ndarray]:
     """
     Returns:
       - timeline features (per sampled frame)
       - metadata/explanation dict
+      - (N, 4) uint8 matrix of the same features quantized to 0..255
+        (column order == FEATURE_NAMES), for cheap stats
     """
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
@@ -39,19 +162,14 @@ def analyze_motion(video_path: Path) -> tuple[list[FrameFeature], dict]:
     fps = fps if fps and fps > 0 else 25.0
     sample_every = max(1, int(round(fps / FRAME_SAMPLE_FPS)))
 
-    mp_pose = mp.solutions.pose
-    mp_hands = mp.solutions.hands
-    mp_face = mp.solutions.face_mesh
-
-    pose = mp_pose.Pose(static_image_mode=False, model_complexity=1, enable_segmentation=False)
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2, model_complexity=0)
-    face = mp_face.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=False)
-
     timeline: list[FrameFeature] = []
+    # sized from the container's frame count, grown if that was an underestimate
+    est_samples = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) // sample_every + 1
+    feats_u8 = np.empty((max(est_samples, 64), 4), dtype=np.uint8)
+    n_feats = 0
 
     prev_center = None
     prev_hand_pts = None
-    frame_idx = 0
 
     explanation = {
         "features": {
@@ -69,123 +187,123 @@ def analyze_motion(video_path: Path) -> tuple[list[FrameFeature], dict]:
         "sampling_fps": FRAME_SAMPLE_FPS,
     }
 
-    def get_xy(landmarks, idx):
-        lm = landmarks[idx]
-        return (float(lm.x), float(lm.y))
-
-    # Common pose indices
-    L_SHO = 11
-    R_SHO = 12
-    L_ELB = 13
-    R_ELB = 14
-    L_HIP = 23
-    R_HIP = 24
-    NOSE = 0
-
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-
-        if frame_idx % sample_every != 0:
-            frame_idx += 1
-            continue
-
-        t_sec = frame_idx / fps
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        pose_res = pose.process(rgb)
-        hands_res = hands.process(rgb)
-        face_res = face.process(rgb)
-
-        posture_open = 0.0
-        hand_act = 0.0
-        eye_contact = 0.0
-        pacing = 0.0
-
-        # --- Pose-based posture + pacing ---
-        if pose_res.pose_landmarks:
-            lm = pose_res.pose_landmarks.landmark
-
-            lsho = get_xy(lm, L_SHO)
-            rsho = get_xy(lm, R_SHO)
-            lelb = get_xy(lm, L_ELB)
-            relb = get_xy(lm, R_ELB)
-            lhip = get_xy(lm, L_HIP)
-            rhip = get_xy(lm, R_HIP)
-            nose = get_xy(lm, NOSE)
-
-            shoulder_w = _dist(lsho, rsho)
-            hip_w = _dist(lhip, rhip)
-            torso_scale = max(1e-6, (shoulder_w + hip_w) / 2.0)
-
-            elbow_spread = (_dist(lelb, relb)) / torso_scale
-            shoulder_norm = shoulder_w / torso_scale
-
-            # openness heuristic: wider shoulders + elbows => more open posture
-            posture_open = _clip01(0.5 * shoulder_norm + 0.5 * _clip01(elbow_spread / 2.0))
-
-            center = ((lsho[0] + rsho[0] + lhip[0] + rhip[0]) / 4.0,
-                      (lsho[1] + rsho[1] + lhip[1] + rhip[1]) / 4.0)
-
-            if prev_center is not None:
-                speed = _dist(center, prev_center) * FRAME_SAMPLE_FPS  # approx per second
-                pacing = _clip01(speed * 4.0)  # scale factor (explainable constant)
-            prev_center = center
-
-            # --- eye contact approx using nose alignment to frame center ---
-            # This is NOT gaze; only "camera-facing-ish" approximation.
-            # If nose x,y close to center => higher.
-            nose_dx = abs(nose[0] - 0.5)
-            nose_dy = abs(nose[1] - 0.45)
-            eye_contact = _clip01(1.0 - (nose_dx * 1.6 + nose_dy * 1.6))
-
-        # --- Hand gesture activity ---
-        hand_pts = []
-        if hands_res.multi_hand_landmarks:
-            for hand_lms in hands_res.multi_hand_landmarks:
-                for p in hand_lms.landmark:
-                    hand_pts.append((float(p.x), float(p.y)))
-
-        if hand_pts:
-            if prev_hand_pts is not None and len(prev_hand_pts) == len(hand_pts):
-                diffs = [_dist(hand_pts[i], prev_hand_pts[i]) for i in range(len(hand_pts))]
-                motion = float(np.mean(diffs)) * FRAME_SAMPLE_FPS
-                hand_act = _clip01(motion * 8.0)  # scale constant
-            prev_hand_pts = hand_pts
-        else:
-            prev_hand_pts = None
-
-        # If face mesh exists, refine eye_contact approx slightly
-        if face_res.multi_face_landmarks:
-            # Use a few stable points: nose tip approx index 1 (varies) - keep it simple:
-            # We'll just reward having a detectable face.
-            eye_contact = _clip01(0.85 * eye_contact + 0.15 * 1.0)
-
-        timeline.append(FrameFeature(
-            t_sec=float(t_sec),
-            posture_openness=float(posture_open),
-            hand_gesture_activity=float(hand_act),
-            eye_contact_approx=float(eye_contact),
-            movement_pacing=float(pacing),
-        ))
-
-        frame_idx += 1
-
-    cap.release()
-    pose.close()
-    hands.close()
-    face.close()
-
-    return timeline, explanation
-
-def timeline_to_csv(timeline: list[FrameFeature]) -> str:
-    lines = ["t_sec,posture_openness,hand_gesture_activity,eye_contact_approx,movement_pacing"]
+    frames: queue.Queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_sampled_frames,
+        args=(cap, sample_every, frames, stop),
+        name="motion-reader",
+        daemon=True,
+    )
+    reader.start()
+    solutions = _acquire_solutions()
+    pose, hands, face = solutions
+
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            frame_idx, rgb = item
+
+            t_sec = frame_idx / fps
+
+            futs = (
+                _MODEL_POOL.submit(pose.process, rgb),
+                _MODEL_POOL.submit(hands.process, rgb),
+                _MODEL_POOL.submit(face.process, rgb),
+            )
+            # all three settle before any error is raised: the shared pool is
+            # not shut down per call, so nothing may still use the solutions
+            # when they are reset and released
+            wait(futs)
+            pose_res, hands_res, face_res = (f.result() for f in futs)
+
+            posture_open = 0.0
+            hand_act = 0.0
+            eye_contact = 0.0
+            pacing = 0.0
+
+            # --- Pose-based posture + pacing ---
+            if pose_res.pose_landmarks:
+                lm = pose_res.pose_landmarks.landmark
+                pts = np.array([(lm[i].x, lm[i].y) for i in POSE_IDS], dtype=np.float32)
+
+                # shoulder / elbow / hip widths in one batched norm
+                shoulder_w, elbow_w, hip_w = np.linalg.norm(pts[_PAIR_A] - pts[_PAIR_B], axis=1)
+                torso_scale = max(1e-6, (shoulder_w + hip_w) / 2.0)
+
+                elbow_spread = elbow_w / torso_scale
+                shoulder_norm = shoulder_w / torso_scale
+
+                # openness heuristic: wider shoulders + elbows => more open posture
+                posture_open = 0.5 * shoulder_norm + 0.5 * min(elbow_spread / 2.0, 1.0)
+
+                center = pts[_TORSO].mean(axis=0)
+
+                if prev_center is not None:
+                    speed = np.linalg.norm(center - prev_center) * FRAME_SAMPLE_FPS  # approx per second
+                    pacing = speed * 4.0  # scale factor (explainable constant)
+                prev_center = center
+
+                # --- eye contact approx using nose alignment to frame center ---
+                # This is NOT gaze; only "camera-facing-ish" approximation.
+                # If nose x,y close to center => higher.
+                nose_off = np.abs(pts[_NOSE] - _FRAME_CENTER).sum()
+                eye_contact = max(0.0, 1.0 - nose_off * 1.6)
+
+            # --- Hand gesture activity ---
+            if hands_res.multi_hand_landmarks:
+                hand_pts = _hand_points(hands_res.multi_hand_landmarks)
+                if prev_hand_pts is not None and prev_hand_pts.shape == hand_pts.shape:
+                    motion = np.linalg.norm(hand_pts - prev_hand_pts, axis=1).mean() * FRAME_SAMPLE_FPS
+                    hand_act = motion * 8.0  # scale constant
+                prev_hand_pts = hand_pts
+            else:
+                prev_hand_pts = None
+
+            # If face mesh exists, refine eye_contact approx slightly
+            if face_res.multi_face_landmarks:
+                # Use a few stable points: nose tip approx index 1 (varies) - keep it simple:
+                # We'll just reward having a detectable face.
+                eye_contact = 0.85 * eye_contact + 0.15 * 1.0
+
+            # every feature is clipped to 0..1 once, here
+            clipped = np.clip((posture_open, hand_act, eye_contact, pacing), 0.0, 1.0)
+            if n_feats == len(feats_u8):
+                feats_u8 = np.concatenate([feats_u8, np.empty_like(feats_u8)])
+            feats_u8[n_feats] = clipped * 255.0 + 0.5  # round to the 1/255 grid
+            n_feats += 1
+            posture_open, hand_act, eye_contact, pacing = clipped.tolist()
+
+            timeline.append(FrameFeature(
+                t_sec=float(t_sec),
+                posture_openness=posture_open,
+                hand_gesture_activity=hand_act,
+                eye_contact_approx=eye_contact,
+                movement_pacing=pacing,
+            ))
+    finally:
+        stop.set()
+        reader.join()
+        cap.release()
+        _release_solutions(solutions)
+
+    return timeline, explanation, feats_u8[:n_feats]
+
+def timeline_to_csv(timeline: list[FrameFeature], fp: IO[str]) -> None:
+    """Write the timeline as CSV row by row (no full-file string in memory)."""
+    fp.write("t_sec,posture_openness,hand_gesture_activity,eye_contact_approx,movement_pacing\n")
     for f in timeline:
-        lines.append(f"{f.t_sec:.3f},{f.posture_openness:.4f},{f.hand_gesture_activity:.4f},{f.eye_contact_approx:.4f},{f.movement_pacing:.4f}")
-    return "\n".join(lines)
-
-def timeline_to_json(timeline: list[FrameFeature]) -> str:
-    arr = [f.__dict__ for f in timeline]
-    return json.dumps(arr, ensure_ascii=False, indent=2)
+        fp.write(f"{f.t_sec:.3f},{f.posture_openness:.4f},{f.hand_gesture_activity:.4f},{f.eye_contact_approx:.4f},{f.movement_pacing:.4f}\n")
+
+def timeline_to_json(timeline: list[FrameFeature], fp: IO[bytes]) -> None:
+    """Write the timeline as a JSON array, one orjson-encoded record at a time."""
+    fp.write(b"[")
+    for i, f in enumerate(timeline):
+        if i:
+            fp.write(b",\n")
+        fp.write(orjson.dumps(f.__dict__))
+    fp.write(b"]\n")
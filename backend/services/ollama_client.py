@@ -1,9 +1,43 @@
 from __future__ import annotations
 
-import json
-import urllib.request
-import urllib.error
+import logging
 from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+import orjson
+
+from backend.config import SETTINGS
+from backend.services.json_stream import JSONFieldStream
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_HOST = "http://127.0.0.1:11434"
+
+# One keep-alive client for the whole app lifetime (closed on FastAPI shutdown),
+# so async callers reuse the connection instead of spawning `ollama run`.
+_CLIENT = httpx.AsyncClient(base_url=OLLAMA_HOST, timeout=60)
+# Same for the sync callers (chat_with_memory; async routes run it via
+# asyncio.to_thread so the event loop is never blocked).
+_SYNC_CLIENT = httpx.Client(
+    base_url=OLLAMA_HOST,
+    timeout=60,
+    limits=httpx.Limits(max_keepalive_connections=8),
+)
+
+
+def ollama_options(options: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    Request options for EVERY Ollama call (chat, JSON, warmup).
+    num_ctx is always SETTINGS.ollama_num_ctx: a runner with a different
+    num_ctx is a model reload, and concurrent calls would thrash it.
+    """
+    return {
+        "temperature": 0.6,
+        "num_predict": 450,
+        **(options or {}),
+        "num_ctx": SETTINGS.ollama_num_ctx,
+    }
 
 
 @dataclass
@@ -12,48 +46,120 @@ class OllamaReply:
     model: str
     text: str
     warning: str = ""
+    timed_out: bool = False
 
 
 def ollama_chat(
     *,
     model: str,
     messages: list[dict],
-    host: str = "http://127.0.0.1:11434",
+    host: str = OLLAMA_HOST,
     timeout_s: int = 120,
+    options: dict[str, Any] | None = None,
+    format: str | None = None,
+    keep_alive: str | None = None,
 ) -> OllamaReply:
     """
     Calls Ollama HTTP API (offline local).
     messages format:
       [{"role":"system|user|assistant","content":"..."}]
+    format="json" makes Ollama emit a single valid JSON object;
+    keep_alive keeps the model loaded between calls (e.g. "30m").
     """
-    url = host.rstrip("/") + "/api/chat"
-    payload = {
+    # absolute URL only when a non-default host is requested
+    url = "/api/chat" if host == OLLAMA_HOST else host.rstrip("/") + "/api/chat"
+    payload: dict[str, Any] = {
         "model": model,
         "messages": messages,
         "stream": False,
-        "options": {
-            "temperature": 0.6,
-            "num_predict": 450,
-        },
+        "options": ollama_options(options),
     }
+    if format:
+        payload["format"] = format
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
+
+    try:
+        resp = _SYNC_CLIENT.post(
+            url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout_s,
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        # Ollama returns: {"message":{"role":"assistant","content":"..."} , ...}
+        content = ""
+        if isinstance(data, dict):
+            msg = data.get("message") or {}
+            content = (msg.get("content") or "").strip()
+        return OllamaReply(ok=True, model=model, text=content or "(no response)")
+    except httpx.TimeoutException:
+        return OllamaReply(
+            ok=False,
+            model=model,
+            text="(fallback) Ollama timed out.",
+            warning=f"Ollama timeout after {timeout_s}s.",
+            timed_out=True,
+        )
+    except httpx.HTTPError as e:
+        return OllamaReply(
+            ok=False,
+            model=model,
+            text="(fallback) Ollama is unavailable.",
+            warning=f"Ollama HTTP error: {e}",
+        )
+    except Exception as e:
+        return OllamaReply(
+            ok=False,
+            model=model,
+            text="(fallback) Ollama call failed.",
+            warning=str(e),
+        )
+
 
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+async def ollama_chat_async(
+    *,
+    model: str,
+    messages: list[dict],
+    timeout_s: int = 120,
+    options: dict[str, Any] | None = None,
+    format: str | None = None,
+    keep_alive: str | None = None,
+) -> OllamaReply:
+    """
+    Async variant of ollama_chat on the shared keep-alive client.
+    NEVER throws; failures come back as ok=False with a warning.
+    """
+    payload: dict[str, Any] = {
+        "model": model,
+        "messages": messages,
+        "stream": False,
+        "options": ollama_options(options),
+    }
+    if format:
+        payload["format"] = format
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
 
     try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-            data = json.loads(resp.read().decode("utf-8", errors="ignore"))
-            # Ollama returns: {"message":{"role":"assistant","content":"..."} , ...}
-            content = ""
-            if isinstance(data, dict):
-                msg = data.get("message") or {}
-                content = (msg.get("content") or "").strip()
-            return OllamaReply(ok=True, model=model, text=content or "(no response)")
-    except urllib.error.URLError as e:
+        resp = await _CLIENT.post("/api/chat", json=payload, timeout=timeout_s)
+        resp.raise_for_status()
+        data = resp.json()
+        content = ""
+        if isinstance(data, dict):
+            msg = data.get("message") or {}
+            content = (msg.get("content") or "").strip()
+        return OllamaReply(ok=True, model=model, text=content or "(no response)")
+    except httpx.TimeoutException:
+        return OllamaReply(
+            ok=False,
+            model=model,
+            text="(fallback) Ollama timed out.",
+            warning=f"Ollama timeout after {timeout_s}s.",
+            timed_out=True,
+        )
+    except httpx.HTTPError as e:
         return OllamaReply(
             ok=False,
             model=model,
@@ -67,3 +173,116 @@ def ollama_chat(
             text="(fallback) Ollama call failed.",
             warning=str(e),
         )
+
+
+async def ollama_chat_stream(
+    *,
+    model: str,
+    messages: list[dict],
+    timeout_s: int = 120,
+    options: dict[str, Any] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streams assistant tokens as Ollama generates them (stream=True).
+    Raises httpx.HTTPError on transport/HTTP failures.
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "options": ollama_options(options),
+    }
+
+    async with _CLIENT.stream("POST", "/api/chat", json=payload, timeout=timeout_s) as resp:
+        resp.raise_for_status()
+        # Ollama sends one JSON object per line: {"message":{"content":"..."},"done":false}
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            data = orjson.loads(line)
+            token = (data.get("message") or {}).get("content") or ""
+            if token:
+                yield token
+            if data.get("done"):
+                break
+
+
+async def ollama_chat_json_fields(
+    *,
+    model: str,
+    messages: list[dict],
+    timeout_s: int = 120,
+    options: dict[str, Any] | None = None,
+    keep_alive: str | None = None,
+    expected_keys: frozenset[str] | None = None,
+    on_field: Callable[[str, Any], None] | None = None,
+) -> dict[str, Any]:
+    """
+    format="json" + stream=True: parses the object while it is generated.
+    on_field(key, value) fires as soon as each top-level value closes.
+    If the first key is not in expected_keys the stream is aborted early
+    (no tokens wasted on a wrong answer).
+    Raises TimeoutError on timeout and RuntimeError on any other failure.
+    """
+    payload: dict[str, Any] = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "format": "json",
+        "options": ollama_options(options),
+    }
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
+
+    parser = JSONFieldStream()
+    try:
+        async with _CLIENT.stream("POST", "/api/chat", json=payload, timeout=timeout_s) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                token = (data.get("message") or {}).get("content") or ""
+                for key, value in parser.feed(token):
+                    if expected_keys is not None and len(parser.fields) == 1 and key not in expected_keys:
+                        raise ValueError(f"unexpected first field {key!r}")
+                    if on_field is not None:
+                        on_field(key, value)
+                if parser.done or data.get("done"):
+                    break
+    except httpx.TimeoutException as e:
+        raise TimeoutError(f"Ollama timeout after {timeout_s}s.") from e
+    except (httpx.HTTPError, ValueError) as e:
+        raise RuntimeError(f"Ollama JSON stream failed: {e}") from e
+
+    if not parser.done:
+        raise RuntimeError("Ollama output ended before the JSON object was complete.")
+    return parser.fields
+
+
+async def warmup_model(
+    *,
+    model: str,
+    keep_alive: str = "1h",
+    options: dict[str, Any] | None = None,
+    timeout_s: int = 300,
+) -> bool:
+    """
+    Load the model into memory ahead of the first real request
+    (empty prompt => Ollama only loads the model and pins it for keep_alive).
+    Uses the same ollama_options() as every real call, so no reload follows.
+    NEVER throws; returns False if Ollama is unavailable.
+    """
+    payload = {"model": model, "prompt": "", "keep_alive": keep_alive, "options": ollama_options(options)}
+    try:
+        resp = await _CLIENT.post("/api/generate", json=payload, timeout=timeout_s)
+        resp.raise_for_status()
+        return True
+    except Exception as e:
+        logger.warning("Ollama warmup failed for %s: %s", model, e)
+        return False
+
+
+async def aclose_client() -> None:
+    await _CLIENT.aclose()
+    _SYNC_CLIENT.close()
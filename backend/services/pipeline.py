@@ -1,57 +1,123 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
+import threading
 from pathlib import Path
+from typing import Any, Callable
 
 from backend.config import (
-    BN_SAVEDMODEL_DIR, BN_VOCAB_PATH, BN_PREPROCESS_PATH,
-    VOSK_MODEL_DIR, RESULTS_DIR,
+    BN_SAVEDMODEL_DIR, BN_VOCAB_PATH, BN_PREPROCESS_PATH, BN_TFLITE_PATH,
+    VOSK_MODEL_DIR, RESULTS_DIR, SETTINGS,
 )
 from backend.services.audio_extract import extract_wav_16k
 from backend.services.lang_detect import detect_language_from_text_hint
 from backend.services.stt_bn_tf import BanglaASR
 from backend.services.stt_en_vosk import EnglishASR, EnglishASRError
 from backend.services.text_clean import clean_text
-from backend.services.sentiment_bd import sentiment_bd
+from backend.services.sentiment_bd import SentimentResult, sentiment_bd
 from backend.services.explain_phase1 import build_sentiment_explanation
 
 from backend.services.motion_features import analyze_motion, timeline_to_csv, timeline_to_json
 from backend.services.stats import summarize_timeline
 
-# Phase-1 LLM (already added)
-from backend.services.llm_social_context import generate_social_context_explanation
-
-# ✅ Phase-2 LLM Coach (NEW)
-from backend.services.llm_motion_coach import generate_motion_coach_feedback
+# Phase-1 social context + Phase-2 coach, batched into one LLM call
+from backend.services.llm_combined import generate_combined_feedback
+from backend.services.llm_motion_coach import LLMCoachResult
+from backend.services.llm_social_context import LLMContextResult
 
 logger = logging.getLogger(__name__)
 
 _bn_asr_singleton: BanglaASR | None = None
 _en_asr_singleton: EnglishASR | None = None
+# pipeline phases run in worker threads; build each model only once
+_asr_lock = threading.Lock()
 
 
 def get_bn_asr() -> BanglaASR:
     global _bn_asr_singleton
     if _bn_asr_singleton is None:
-        _bn_asr_singleton = BanglaASR(
-            savedmodel_dir=BN_SAVEDMODEL_DIR,
-            vocab_path=BN_VOCAB_PATH,
-            preprocess_path=BN_PREPROCESS_PATH,
-        )
+        with _asr_lock:
+            if _bn_asr_singleton is None:
+                _bn_asr_singleton = BanglaASR(
+                    savedmodel_dir=BN_SAVEDMODEL_DIR,
+                    vocab_path=BN_VOCAB_PATH,
+                    preprocess_path=BN_PREPROCESS_PATH,
+                    tflite_path=BN_TFLITE_PATH if SETTINGS.bn_asr_tflite else None,
+                )
     return _bn_asr_singleton
 
 
 def get_en_asr() -> EnglishASR:
     global _en_asr_singleton
     if _en_asr_singleton is None:
-        _en_asr_singleton = EnglishASR(VOSK_MODEL_DIR)
+        with _asr_lock:
+            if _en_asr_singleton is None:
+                _en_asr_singleton = EnglishASR(VOSK_MODEL_DIR)
     return _en_asr_singleton
 
 
-def run_full_pipeline(video_path: Path, text_hint: str | None = None) -> dict:
+def _social_context_fields(llm_ctx: LLMContextResult) -> dict[str, Any]:
+    return {
+        "social_context_ok": llm_ctx.ok,
+        "social_context_model": llm_ctx.model,
+        "social_context_explanation": llm_ctx.explanation,
+        "social_context_flags": llm_ctx.flags,
+        "social_context_warning": llm_ctx.warning,
+    }
+
+
+def _coach_fields(coach: LLMCoachResult) -> dict[str, Any]:
+    return {
+        # ✅ NEW fields for UI
+        "coach_ok": coach.ok,
+        "coach_model": coach.model,
+        "coach_feedback": coach.feedback,
+        "coach_json": coach.json_data,
+        "coach_warning": coach.warning,
+    }
+
+
+async def run_full_pipeline(
+    video_path: Path,
+    text_hint: str | None = None,
+    on_event: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict:
+    """
+    on_event(name, fields) fires with the "social_context" / "motion_coach"
+    UI fields as soon as each LLM answer is parsed (before the call ends).
+    """
     logger.info("Running pipeline for %s", video_path)
 
+    # Phase-1 (audio/STT/sentiment) and Phase-2 (motion) share nothing but
+    # the input video, so they run concurrently.
+    (phase1, sent), (phase2, stats, phase2_expl) = await asyncio.gather(
+        asyncio.to_thread(_run_phase1, video_path, text_hint),
+        _run_phase2(video_path),
+    )
+
+    on_result = None
+    if on_event is not None:
+        def on_result(key: str, result: Any) -> None:
+            fields = _social_context_fields(result) if key == "social_context" else _coach_fields(result)
+            on_event(key, fields)
+
+    # Social context (Phase-1) + AI coach (Phase-2): one batched LLM call — safe fallback
+    llm_ctx, coach = await generate_combined_feedback(
+        transcript=phase1["transcript"],
+        sent=sent,
+        language=phase1["language"],
+        stats=stats,
+        motion_explanation=phase2_expl if isinstance(phase2_expl, dict) else None,
+        on_result=on_result,
+    )
+
+    phase1.update(_social_context_fields(llm_ctx))
+    phase2.update(_coach_fields(coach))
+    return {"phase1": phase1, "phase2": phase2}
+
+
+def _run_phase1(video_path: Path, text_hint: str | None) -> tuple[dict, SentimentResult]:
     # -----------------------------
     # Phase-1: audio + STT
     # -----------------------------
@@ -85,55 +151,38 @@ def run_full_pipeline(video_path: Path, text_hint: str | None = None) -> dict:
     # Rule-based explanation
     explanation = build_sentiment_explanation(transcript, sent)
 
-    # LLM Social Context (safe fallback)
-    llm_ctx = generate_social_context_explanation(
-        text=transcript,
-        sentiment_label=sent.label,
-        sentiment_score=sent.score,
-        matched_positive=sent.matched_positive,
-        matched_negative=sent.matched_negative,
-        language=language,
-    )
-
     phase1 = {
         "language": language,
         "transcript": transcript,
         "sentiment": sent.label,
         "sentiment_score": sent.score,
         "explanation": explanation,
-        "social_context_ok": llm_ctx.ok,
-        "social_context_model": llm_ctx.model,
-        "social_context_explanation": llm_ctx.explanation,
-        "social_context_flags": llm_ctx.flags,
-        "social_context_warning": llm_ctx.warning,
     }
+    return phase1, sent
+
 
+def _write_timeline(timeline: list, csv_path: Path, json_path: Path) -> None:
+    with csv_path.open("w", encoding="utf-8", newline="") as f:
+        timeline_to_csv(timeline, f)
+    with json_path.open("wb") as f:
+        timeline_to_json(timeline, f)
+
+
+async def _run_phase2(video_path: Path) -> tuple[dict, dict, dict]:
     # -----------------------------
     # Phase-2: motion analysis
     # -----------------------------
-    timeline, phase2_expl = analyze_motion(video_path)
-    stats = summarize_timeline(timeline)
+    timeline, phase2_expl, features_u8 = await asyncio.to_thread(analyze_motion, video_path)
+    stats = summarize_timeline(timeline, features_u8)
 
     key = video_path.stem
     csv_path = RESULTS_DIR / f"{key}_timeline.csv"
     json_path = RESULTS_DIR / f"{key}_timeline.json"
 
-    csv_path.write_text(timeline_to_csv(timeline), encoding="utf-8")
-    json_path.write_text(timeline_to_json(timeline), encoding="utf-8")
-
-    # Load timeline JSON into memory so frontend can draw graphs
-    timeline_data = None
-    try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            timeline_data = json.load(f)
-    except Exception:
-        timeline_data = None
+    await asyncio.to_thread(_write_timeline, timeline, csv_path, json_path)
 
-    # ✅ NEW: Phase-2 AI Coach (Ollama) — safe fallback
-    coach = generate_motion_coach_feedback(
-        stats=stats,
-        motion_explanation=phase2_expl if isinstance(phase2_expl, dict) else None,
-    )
+    # Same records the JSON file holds, for the frontend graphs (no re-read)
+    timeline_data = [f.__dict__ for f in timeline]
 
     phase2 = {
         "timeline_csv_path": str(csv_path),
@@ -141,16 +190,8 @@ def run_full_pipeline(video_path: Path, text_hint: str | None = None) -> dict:
         "timeline_data": timeline_data,
         "stats": stats,
         "explanation": phase2_expl,
-
-        # ✅ NEW fields for UI
-        "coach_ok": coach.ok,
-        "coach_model": coach.model,
-        "coach_feedback": coach.feedback,
-        "coach_json": coach.json_data,
-        "coach_warning": coach.warning,
     }
-
-    return {"phase1": phase1, "phase2": phase2}
+    return phase2, stats, phase2_expl
 
 
 def _looks_bangla(text: str) -> bool:
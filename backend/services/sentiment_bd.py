@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 
 @dataclass
@@ -11,32 +12,29 @@ class SentimentResult:
     notes: list[str]
 
 # Explainable Bangladesh-context lexicon (small, hackathon-safe)
-BN_POS = {
+BN_POS = frozenset({
     "ভালো", "চমৎকার", "দারুণ", "সুন্দর", "অসাধারণ", "ধন্যবাদ", "প্রশংসা", "সাফল্য",
     "উন্নতি", "সঠিক", "সাহায্য", "খুশি", "আনন্দ"
-}
-BN_NEG = {
+})
+BN_NEG = frozenset({
     "খারাপ", "ভয়", "দুঃখ", "দুঃখিত", "রাগ", "ক্ষতি", "ব্যর্থ", "মিথ্যা", "অন্যায়",
     "সমস্যা", "দুর্নীতি", "অসন্তোষ", "কষ্ট"
-}
+})
 
-EN_POS = {"good", "great", "excellent", "amazing", "thank", "success", "improve", "happy", "love", "helpful"}
-EN_NEG = {"bad", "angry", "sad", "fear", "loss", "fail", "fake", "unfair", "problem", "corrupt", "hurt"}
+EN_POS = frozenset({"good", "great", "excellent", "amazing", "thank", "success", "improve", "happy", "love", "helpful"})
+EN_NEG = frozenset({"bad", "angry", "sad", "fear", "loss", "fail", "fake", "unfair", "problem", "corrupt", "hurt"})
+
+# one lookup per token instead of four
+POS_WORDS = BN_POS | EN_POS
+NEG_WORDS = BN_NEG | EN_NEG
+
+# token = run of alphanumerics ([^\W_] == str.isalnum) or Bangla block chars
+# (the block also covers vowel signs / hasanta, which are not isalnum)
+_TOKEN_RE = re.compile(r"(?:[^\W_]|[\u0980-\u09FF])+")
 
 def tokenize_simple(text: str) -> list[str]:
     # keep Bangla & English letters, split on others
-    out = []
-    buf = []
-    for ch in text.lower():
-        if ch.isalnum() or ("\u0980" <= ch <= "\u09FF"):
-            buf.append(ch)
-        else:
-            if buf:
-                out.append("".join(buf))
-                buf = []
-    if buf:
-        out.append("".join(buf))
-    return out
+    return _TOKEN_RE.findall(text.lower())
 
 def sentiment_bd(text: str) -> SentimentResult:
     toks = tokenize_simple(text)
@@ -44,9 +42,9 @@ def sentiment_bd(text: str) -> SentimentResult:
     neg_hit = []
 
     for t in toks:
-        if t in BN_POS or t in EN_POS:
+        if t in POS_WORDS:
             pos_hit.append(t)
-        if t in BN_NEG or t in EN_NEG:
+        if t in NEG_WORDS:
             neg_hit.append(t)
 
     # Explainable scoring
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import numpy as np
-from backend.services.motion_features import FrameFeature
-
-def summarize_timeline(timeline: list[FrameFeature]) -> dict:
+from backend.services.motion_features import FEATURE_NAMES, FrameFeature
+
+def summarize_timeline(timeline: list[FrameFeature], features_u8: np.ndarray | None = None) -> dict:
+    """
+    features_u8: optional (N, 4) uint8 matrix from analyze_motion (0..255 ==
+    0..1, column order == FEATURE_NAMES). When given, stats are reduced over
+    it instead of re-reading the float timeline.
+    """
     if not timeline:
         return {
             "count": 0,
@@ -12,13 +17,25 @@ def summarize_timeline(timeline: list[FrameFeature]) -> dict:
             "notes": ["No frames were analyzed. Video may be unreadable or too short."]
         }
 
-    def arr(name: str) -> np.ndarray:
-        return np.array([getattr(f, name) for f in timeline], dtype=np.float32)
-
-    feats = ["posture_openness", "hand_gesture_activity", "eye_contact_approx", "movement_pacing"]
-
-    averages = {k: float(arr(k).mean()) for k in feats}
-    variability = {k: float(arr(k).std()) for k in feats}
+    feats = list(FEATURE_NAMES)
+
+    if features_u8 is not None and len(features_u8) == len(timeline):
+        # quantized path: float32 accumulators over uint8 data, then rescale
+        means = features_u8.mean(axis=0, dtype=np.float32) / 255.0
+        stds = features_u8.std(axis=0, dtype=np.float32) / 255.0
+    else:
+        # one (N, 4) matrix, reduced along axis 0 (column order == feats)
+        m = np.fromiter(
+            (v for f in timeline
+             for v in (f.posture_openness, f.hand_gesture_activity, f.eye_contact_approx, f.movement_pacing)),
+            dtype=np.float32,
+            count=4 * len(timeline),
+        ).reshape(-1, 4)
+        means = m.mean(axis=0)
+        stds = m.std(axis=0)
+
+    averages = dict(zip(feats, means.tolist()))
+    variability = dict(zip(feats, stds.tolist()))
 
     # Human-friendly levels
     def level(x: float) -> str:
@@ -1,16 +1,51 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
-from backend.config import UPLOADS_DIR, URL_CACHE_DIR, AUDIO_DIR, RESULTS_DIR, TEMP_DIR
 
-def ensure_dirs() -> None:
-    for d in (UPLOADS_DIR, URL_CACHE_DIR, AUDIO_DIR, RESULTS_DIR, TEMP_DIR):
-        d.mkdir(parents=True, exist_ok=True)
+import aiofiles
+
+from backend.config import (
+    UPLOADS_DIR, URL_CACHE_DIR, AUDIO_DIR, RESULTS_DIR, TEMP_DIR, JINJA_CACHE_DIR,
+    DOWNLOADS_DIR, CHAT_SESSIONS_DIR, CHAT_VOICE_DIR, CHAT_TTS_DIR,
+)
+
+_ensured = False
+_ensure_lock = threading.Lock()
+
+def ensure_dirs(force: bool = False) -> None:
+    """
+    Create storage dirs once per process (called from the startup hook).
+    force=True re-runs the mkdirs, e.g. after a test wiped storage.
+    """
+    global _ensured
+    if _ensured and not force:
+        return
+    with _ensure_lock:
+        if _ensured and not force:
+            return
+        for d in (
+            UPLOADS_DIR, URL_CACHE_DIR, AUDIO_DIR, RESULTS_DIR, TEMP_DIR, JINJA_CACHE_DIR,
+            DOWNLOADS_DIR, CHAT_SESSIONS_DIR, CHAT_VOICE_DIR, CHAT_TTS_DIR,
+        ):
+            d.mkdir(parents=True, exist_ok=True)
+        _ensured = True
 
 def safe_unlink(path: Path) -> None:
     try:
-        if path.exists():
-            path.unlink()
+        path.unlink(missing_ok=True)
     except Exception:
         # best effort cleanup
         pass
+
+async def stream_upload_to_disk(upload, dest: Path, chunk_size: int = 1 << 20, hasher=None) -> None:
+    """
+    Copy an UploadFile to dest chunk by chunk.
+    Peak memory stays at chunk_size and the event loop is yielded between chunks.
+    hasher (hashlib object) is fed the same chunks, so no second read is needed.
+    """
+    async with aiofiles.open(dest, "wb") as f:
+        while chunk := await upload.read(chunk_size):
+            if hasher is not None:
+                hasher.update(chunk)
+            await f.write(chunk)
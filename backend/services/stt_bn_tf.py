@@ -2,10 +2,15 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import scipy.fft as sp_fft
 import soundfile as sf
 import tensorflow as tf
 
@@ -38,6 +43,16 @@ def load_vocab(vocab_path: Path) -> tuple[int, list[str]]:
     return blank, id_to_char
 
 
+def vocab_codes(id_to_char: list[str]) -> np.ndarray | None:
+    """
+    Code point per id (little-endian UTF-32) when every entry is a single
+    character, else None. Lets the decoder map ids to text with one np.take.
+    """
+    if not all(len(c) == 1 for c in id_to_char):
+        return None
+    return np.array([ord(c) for c in id_to_char], dtype="<u4")
+
+
 def load_preprocess(preprocess_path: Path) -> BNPreprocessConfig:
     obj = json.loads(preprocess_path.read_text(encoding="utf-8"))
     return BNPreprocessConfig(
@@ -58,59 +73,93 @@ def load_preprocess(preprocess_path: Path) -> BNPreprocessConfig:
 # ----------------------------
 
 def wav_read_mono_16k(wav_path: Path, expected_sr: int = 16000) -> np.ndarray:
-    audio, sr = sf.read(str(wav_path), dtype="float32", always_2d=False)
-    if sr != expected_sr:
-        raise ValueError(
-            f"WAV sample rate must be {expected_sr}, got {sr}. "
-            "Ensure ffmpeg resample to 16kHz ran."
-        )
-    if audio.ndim == 2:
-        audio = np.mean(audio, axis=1).astype("float32")
+    with sf.SoundFile(str(wav_path)) as f:
+        if f.samplerate != expected_sr:
+            raise ValueError(
+                f"WAV sample rate must be {expected_sr}, got {f.samplerate}. "
+                "Ensure ffmpeg resample to 16kHz ran."
+            )
+        # decode straight into one preallocated float32 buffer
+        if f.channels == 1:
+            audio = f.read(out=np.empty(f.frames, dtype=np.float32))
+        else:
+            frames = f.read(out=np.empty((f.frames, f.channels), dtype=np.float32))
+            audio = frames.mean(axis=1)  # float32 in => float32 out, no astype copy
     return audio
 
 
-def mel_spectrogram(audio: np.ndarray, cfg: BNPreprocessConfig) -> np.ndarray:
+@lru_cache(maxsize=4)
+def _hann_window(win_length: int) -> np.ndarray:
+    # TF's periodic Hann (np.hanning is the symmetric one): must match training
+    return tf.signal.hann_window(win_length, dtype=tf.float32).numpy()
+
+
+@lru_cache(maxsize=4)
+def _mel_weight_matrix(n_mels: int, n_fft: int, sample_rate: int, fmin: float, fmax: float) -> np.ndarray:
+    return tf.signal.linear_to_mel_weight_matrix(
+        num_mel_bins=n_mels,
+        num_spectrogram_bins=n_fft // 2 + 1,
+        sample_rate=sample_rate,
+        lower_edge_hertz=fmin,
+        upper_edge_hertz=fmax,
+    ).numpy()
+
+
+def mel_filters(cfg: BNPreprocessConfig) -> tuple[np.ndarray, np.ndarray]:
+    """(mel weight matrix, hann window) for cfg; built once per config (via TF)."""
+    return (
+        _mel_weight_matrix(cfg.n_mels, cfg.n_fft, cfg.sample_rate, cfg.fmin, cfg.fmax),
+        _hann_window(cfg.win_length),
+    )
+
+
+def _frame_audio(audio: np.ndarray, win_length: int, hop_length: int) -> np.ndarray:
+    """(n_frames, win_length) strided view, zero-padded at the end like tf.signal.stft(pad_end=True)."""
+    n = len(audio)
+    n_frames = -(-n // hop_length)
+    padded = np.zeros((n_frames - 1) * hop_length + win_length, dtype=np.float32)
+    padded[:n] = audio
+    return sliding_window_view(padded, win_length)[::hop_length]
+
+
+def mel_spectrogram(
+    audio: np.ndarray,
+    cfg: BNPreprocessConfig,
+    mel_w: np.ndarray | None = None,
+    window: np.ndarray | None = None,
+) -> np.ndarray:
     """
     Standard log-mel pipeline.
     MUST match training preprocess.json values exactly.
+    mel_w / window: precomputed from mel_filters(cfg) (looked up if omitted).
     Output shape: (time, n_mels)
     """
-    x = tf.convert_to_tensor(audio, dtype=tf.float32)
-
-    stft = tf.signal.stft(
-        x,
-        frame_length=cfg.win_length,
-        frame_step=cfg.hop_length,
-        fft_length=cfg.n_fft,
-        window_fn=tf.signal.hann_window,
-        pad_end=True,
-    )
-    mag = tf.abs(stft)
-
-    mel_w = tf.signal.linear_to_mel_weight_matrix(
-        num_mel_bins=cfg.n_mels,
-        num_spectrogram_bins=int(mag.shape[-1]),
-        sample_rate=cfg.sample_rate,
-        lower_edge_hertz=cfg.fmin,
-        upper_edge_hertz=cfg.fmax,
-    )
-    mel = tf.matmul(tf.square(mag), mel_w)
+    if mel_w is None or window is None:
+        mel_w, window = mel_filters(cfg)
 
-    if cfg.log_mel:
-        mel = tf.math.log(tf.maximum(mel, 1e-10))
+    if len(audio) == 0:
+        return np.zeros((0, cfg.n_mels), dtype=np.float32)
 
-    mel_np = mel.numpy().astype("float32")
+    # same framing/window/fft_length as tf.signal.stft, on scipy's float32 rFFT
+    frames = _frame_audio(audio, cfg.win_length, cfg.hop_length) * window
+    spec = sp_fft.rfft(frames, n=cfg.n_fft, axis=-1)
+    power = np.square(spec.real)
+    power += np.square(spec.imag)
 
-    if cfg.normalize == "per_feature":
-        mean = mel_np.mean(axis=0, keepdims=True)
-        std = mel_np.std(axis=0, keepdims=True) + 1e-6
-        mel_np = (mel_np - mean) / std
-    elif cfg.normalize == "global":
-        mean = mel_np.mean()
-        std = mel_np.std() + 1e-6
-        mel_np = (mel_np - mean) / std
+    mel = power @ mel_w
 
-    return mel_np
+    if cfg.log_mel:
+        np.maximum(mel, 1e-10, out=mel)
+        np.log(mel, out=mel)
+
+    if cfg.normalize in ("per_feature", "global"):
+        axis = 0 if cfg.normalize == "per_feature" else None
+        mean = mel.mean(axis=axis, keepdims=True)
+        var = mel.var(axis=axis, keepdims=True)
+        mel -= mean
+        mel *= 1.0 / np.sqrt(var + 1e-12)
+
+    return mel
 
 
 def pad_or_trim_time(feats: np.ndarray, target_T: int) -> np.ndarray:
@@ -122,39 +171,87 @@ def pad_or_trim_time(feats: np.ndarray, target_T: int) -> np.ndarray:
     if T == target_T:
         return feats
     if T > target_T:
-        return feats[:target_T, :]
-    pad_len = target_T - T
-    pad = np.zeros((pad_len, F), dtype=feats.dtype)
-    return np.vstack([feats, pad])
+        return np.ascontiguousarray(feats[:target_T])
+    out = np.zeros((target_T, F), dtype=feats.dtype)
+    out[:T] = feats
+    return out
 
 
 # ----------------------------
 # CTC decode
 # ----------------------------
 
-def ctc_greedy_decode(logits: np.ndarray, blank_index: int, id_to_char: list[str]) -> str:
+def _is_probability_row(row: np.ndarray) -> bool:
+    return bool(row.min() >= 0.0) and abs(float(row.sum()) - 1.0) < 1e-3
+
+
+def ctc_greedy_decode(
+    logits: np.ndarray,
+    blank_index: int,
+    id_to_char: list[str],
+    codes: np.ndarray | None = None,
+) -> str:
     """
     logits: (time, vocab)
+    codes: vocab_codes(id_to_char), if precomputed
     """
-    pred_ids = np.argmax(logits, axis=-1).tolist()
+    if len(logits) and _is_probability_row(logits[0]):
+        # softmax output: blank prob > 0.5 makes blank the argmax regardless of
+        # the other columns, so those frames only cost one column read and the
+        # full-vocab argmax runs on the remaining frames
+        cand = np.flatnonzero(logits[:, blank_index] <= 0.5)
+        ids = np.full(len(logits), blank_index, dtype=np.intp)
+        ids[cand] = np.argmax(logits[cand], axis=-1)
+    else:
+        ids = np.argmax(logits, axis=-1)
+
+    # leading/trailing blanks never emit anything: drop them up front
+    nz = np.flatnonzero(ids != blank_index)
+    if nz.size == 0:
+        return ""
+    ids = ids[nz[0]:nz[-1] + 1]
+
+    # collapse repeats, then remove blanks (a blank between repeats keeps both)
+    keep = np.empty(ids.shape, dtype=bool)
+    keep[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=keep[1:])
+    out = ids[keep]
+    out = out[(out != blank_index) & (out < len(id_to_char))]
+
+    if codes is not None:
+        return np.take(codes, out).tobytes().decode("utf-32-le").strip()
+    return "".join([id_to_char[pid] for pid in out.tolist()]).strip()
+
+
+def _as_numpy(y) -> np.ndarray:
+    # EagerTensor.numpy() shares the CPU buffer; np.array(y) always copied it
+    return y.numpy() if isinstance(y, tf.Tensor) else np.asarray(y)
 
-    out: list[int] = []
-    prev = None
-    for pid in pred_ids:
-        if pid == blank_index:
-            prev = pid
-            continue
-        if prev is not None and pid == prev:
-            continue
-        out.append(pid)
-        prev = pid
 
-    chars: list[str] = []
-    for pid in out:
-        if 0 <= pid < len(id_to_char):
-            chars.append(id_to_char[pid])
+# ----------------------------
+# INT8 TFLite
+# ----------------------------
 
-    return "".join(chars).strip()
+def load_tflite_int8(savedmodel_dir: Path, tflite_path: Path) -> tf.lite.Interpreter | None:
+    """
+    Dynamic-range INT8 TFLite copy of the SavedModel (converted once, cached
+    at tflite_path). Returns None if conversion or loading fails, so the
+    caller keeps using the FP32 SavedModel.
+    """
+    try:
+        if not tflite_path.exists():
+            logger.info("Converting %s to INT8 TFLite (one-time)", savedmodel_dir)
+            converter = tf.lite.TFLiteConverter.from_saved_model(str(savedmodel_dir))
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            tmp = tflite_path.with_suffix(".tmp")
+            tmp.write_bytes(converter.convert())
+            tmp.replace(tflite_path)
+        interpreter = tf.lite.Interpreter(model_path=str(tflite_path), num_threads=os.cpu_count())
+        interpreter.allocate_tensors()
+        return interpreter
+    except Exception as e:
+        logger.warning("INT8 TFLite model unavailable (%s); using the SavedModel.", e)
+        return None
 
 
 # ----------------------------
@@ -168,11 +265,22 @@ class BanglaASR:
       1) Keras-callable model -> model(x)
       2) non-callable _UserObject -> signature inference (serving_default)
     Forces CPU execution to avoid MPSGraph crashes on Apple Silicon.
+    If tflite_path is given, inference runs on an INT8 TFLite copy instead
+    (SavedModel stays as the fallback).
     """
 
-    def __init__(self, savedmodel_dir: Path, vocab_path: Path, preprocess_path: Path):
+    def __init__(
+        self,
+        savedmodel_dir: Path,
+        vocab_path: Path,
+        preprocess_path: Path,
+        tflite_path: Path | None = None,
+    ):
         self.blank_index, self.id_to_char = load_vocab(vocab_path)
+        self._vocab_codes = vocab_codes(self.id_to_char)
         self.cfg = load_preprocess(preprocess_path)
+        # fixed for the lifetime of the model: build once, reuse per request
+        self._mel_w, self._window = mel_filters(self.cfg)
 
         logger.info("Loading Bangla ASR SavedModel from %s", savedmodel_dir)
 
@@ -219,10 +327,37 @@ class BanglaASR:
                 self.input_key, self.output_key
             )
 
+        self._tflite = load_tflite_int8(savedmodel_dir, tflite_path) if tflite_path else None
+        # a TFLite interpreter is not thread-safe
+        self._tflite_lock = threading.Lock()
+        if self._tflite is not None:
+            self._tfl_in = self._tflite.get_input_details()[0]
+            outs = self._tflite.get_output_details()
+            self._tfl_out = next((o for o in outs if "logits" in o["name"]), outs[0])["index"]
+            logger.info("Using INT8 TFLite model %s", tflite_path)
+
+        # the input spec is fixed once loaded: inspect it here, not per request
+        self._sig_T, self._sig_F = self._infer_fixed_shape_from_signature()
+
+        # Keras-callable path: trace model(x) once into a graph for every
+        # input length, instead of eager Keras __call__ dispatch per request
+        self._keras_fn = None
+        if callable(self.model):
+            self._keras_fn = tf.function(
+                lambda x: self.model(x, training=False),
+                input_signature=[tf.TensorSpec([1, self._sig_T, self._sig_F or self.cfg.n_mels], tf.float32)],
+            )
+
     def _infer_fixed_shape_from_signature(self) -> tuple[int | None, int | None]:
         """
         Try to infer fixed (T, F) from signature input spec shape: (None, T, F)
         """
+        if self._tflite is not None:
+            shp = self._tfl_in["shape_signature"]
+            if len(shp) == 3:
+                return (int(shp[1]) if shp[1] > 0 else None, int(shp[2]) if shp[2] > 0 else None)
+            return (None, None)
+
         if self.infer_fn is None or self.input_key is None:
             return (None, None)
 
@@ -243,10 +378,10 @@ class BanglaASR:
 
     def transcribe_wav(self, wav_path: Path) -> str:
         audio = wav_read_mono_16k(wav_path, expected_sr=self.cfg.sample_rate)
-        feats = mel_spectrogram(audio, self.cfg)  # (T, F)
+        feats = mel_spectrogram(audio, self.cfg, self._mel_w, self._window)  # (T, F)
 
         # If signature tells fixed shape, enforce it
-        sig_T, sig_F = self._infer_fixed_shape_from_signature()
+        sig_T, sig_F = self._sig_T, self._sig_F
 
         # Validate F (n_mels) if fixed
         if sig_F is not None and feats.shape[1] != sig_F:
@@ -263,9 +398,11 @@ class BanglaASR:
         x_tf = tf.convert_to_tensor(x, dtype=tf.float32)
 
         # ---- Inference (FORCE CPU) ----
-        if callable(self.model):
+        if self._tflite is not None:
+            logits = self._run_tflite(x)
+        elif callable(self.model):
             with tf.device("/CPU:0"):
-                y = self.model(x_tf, training=False)
+                y = self._keras_fn(x_tf)
 
             if isinstance(y, dict):
                 for k in ("logits", "outputs", "y_pred", "output_0"):
@@ -273,7 +410,7 @@ class BanglaASR:
                         y = y[k]
                         break
 
-            logits = np.array(y)[0]
+            logits = _as_numpy(y)[0]
         else:
             assert self.infer_fn is not None and self.input_key is not None
             with tf.device("/CPU:0"):
@@ -284,6 +421,17 @@ class BanglaASR:
             else:
                 y = outputs
 
-            logits = np.array(y)[0]
+            logits = _as_numpy(y)[0]
+
+        return ctc_greedy_decode(logits, self.blank_index, self.id_to_char, self._vocab_codes)
 
-        return ctc_greedy_decode(logits, self.blank_index, self.id_to_char)
+    def _run_tflite(self, x: np.ndarray) -> np.ndarray:
+        assert self._tflite is not None
+        with self._tflite_lock:
+            if tuple(self._tfl_in["shape"]) != x.shape:
+                self._tflite.resize_tensor_input(self._tfl_in["index"], x.shape)
+                self._tflite.allocate_tensors()
+                self._tfl_in = self._tflite.get_input_details()[0]
+            self._tflite.set_tensor(self._tfl_in["index"], x)
+            self._tflite.invoke()
+            return self._tflite.get_tensor(self._tfl_out)[0]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+import queue
+import threading
 from pathlib import Path
 
 import soundfile as sf
@@ -9,6 +11,8 @@ from vosk import Model, KaldiRecognizer
 class EnglishASRError(RuntimeError):
     pass
 
+_END = object()  # reader thread sentinel
+
 class EnglishASR:
     def __init__(self, vosk_model_dir: Path):
         if not vosk_model_dir.exists():
@@ -20,20 +24,55 @@ class EnglishASR:
         self.model = Model(str(vosk_model_dir))
 
     def transcribe_wav(self, wav_path: Path) -> str:
-        audio, sr = sf.read(str(wav_path), dtype="int16")
-        if sr != 16000:
-            raise EnglishASRError(f"Expected 16k wav. Got sr={sr}")
-        if audio.ndim == 2:
-            audio = audio.mean(axis=1).astype("int16")
+        chunk_size = 4000
 
-        rec = KaldiRecognizer(self.model, 16000)
-        rec.SetWords(True)
+        # a reader thread decodes the next blocks from disk while Vosk (native
+        # code, GIL released) works on the current one; memory stays
+        # O(chunk_size), not O(duration)
+        q: queue.Queue = queue.Queue(maxsize=2)
+        stop = threading.Event()
 
-        # stream in chunks
-        chunk_size = 4000
-        buf = audio.tobytes()
-        for i in range(0, len(buf), chunk_size * 2):
-            rec.AcceptWaveform(buf[i : i + chunk_size * 2])
+        def put(item) -> bool:
+            # blocking put that gives up once the consumer has stopped
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                with sf.SoundFile(str(wav_path)) as f:
+                    if f.samplerate != 16000:
+                        raise EnglishASRError(f"Expected 16k wav. Got sr={f.samplerate}")
+                    for block in f.blocks(blocksize=chunk_size, dtype="int16", always_2d=False):
+                        if block.ndim == 2:
+                            block = block.mean(axis=1).astype("int16")
+                        if not put(block.tobytes()):
+                            return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_END)
+
+        reader = threading.Thread(target=produce, name="vosk-reader", daemon=True)
+        reader.start()
+        try:
+            rec = KaldiRecognizer(self.model, 16000)
+            rec.SetWords(True)
+
+            while (item := q.get()) is not _END:
+                if isinstance(item, EnglishASRError):
+                    raise item
+                if isinstance(item, Exception):
+                    raise EnglishASRError(f"Reading {wav_path} failed: {item}") from item
+                rec.AcceptWaveform(item)
+        finally:
+            # on any failure here the reader stops at its next put and closes the file
+            stop.set()
+            reader.join()
 
         final = json.loads(rec.FinalResult())
         return (final.get("text") or "").strip()
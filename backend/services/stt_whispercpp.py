@@ -3,6 +3,8 @@ import subprocess
 import tempfile
 import logging
 
+logger = logging.getLogger(__name__)
+
 class STTError(Exception):
     pass
 
@@ -16,35 +18,59 @@ def stt_whispercpp(input_path: str, language: str = "auto") -> str:
     if not os.path.exists(WHISPER_BIN):
         raise STTError(f"Whisper binary not found at {WHISPER_BIN}")
 
-    # 1. Prepare temporary WAV file (Whisper requirement: 16kHz mono)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_wav:
-        wav_path = tmp_wav.name
-
-    try:
-        # Convert input to 16kHz Mono WAV using ffmpeg
-        conversion_cmd = [
-            "ffmpeg", "-y", "-i", str(input_path),
-            "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", wav_path
-        ]
-        subprocess.run(conversion_cmd, check=True, capture_output=True)
-
-        # 2. Run Whisper CLI
-        whisper_cmd = [
-            WHISPER_BIN,
-            "-m", WHISPER_MODEL,
-            "-f", wav_path,
-            "-nt", # no timestamps
-            "-l", language if language != "auto" else "en" 
-        ]
-        
-        result = subprocess.run(whisper_cmd, capture_output=True, text=True, check=True)
-        return result.stdout.strip()
-
-    except subprocess.CalledProcessError as e:
-        logging.error(f"STT Subprocess Error: {e.stderr}")
-        raise STTError(f"STT process failed: {e.stderr}")
-    except Exception as e:
-        raise STTError(f"Unexpected STT error: {str(e)}")
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
\ No newline at end of file
+    # ffmpeg decodes/resamples to 16kHz mono WAV on a pipe while whisper-cli
+    # loads its model and reads the audio from stdin ("-f -"): the two
+    # processes overlap and no temp WAV is written to disk
+    conversion_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error", "-i", str(input_path),
+        "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", "-f", "wav", "pipe:1"
+    ]
+    whisper_cmd = [
+        WHISPER_BIN,
+        "-m", WHISPER_MODEL,
+        "-f", "-",
+        "-nt", # no timestamps
+        "-l", language if language != "auto" else "en"
+    ]
+
+    # ffmpeg stderr goes to a temp file: a PIPE nobody reads could fill and stall it
+    with tempfile.TemporaryFile() as ff_err:
+        try:
+            ff = subprocess.Popen(conversion_cmd, stdout=subprocess.PIPE, stderr=ff_err)
+        except Exception as e:
+            raise STTError(f"Unexpected STT error: {str(e)}")
+        wh = None
+        try:
+            try:
+                wh = subprocess.Popen(
+                    whisper_cmd, stdin=ff.stdout,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                )
+            finally:
+                # whisper-cli owns the read end now; lets ffmpeg see SIGPIPE if it exits
+                ff.stdout.close()
+            out, err = wh.communicate()
+        except Exception as e:
+            raise STTError(f"Unexpected STT error: {str(e)}")
+        finally:
+            # never leave a process running or unreaped, e.g. when whisper-cli
+            # failed to start or communicate() was interrupted
+            if wh is not None and wh.poll() is None:
+                wh.kill()
+                wh.wait()
+            if wh is None or wh.returncode != 0:
+                if ff.poll() is None:
+                    ff.kill()
+            ff.wait()
+
+        # < 0: killed by us / SIGPIPE after whisper-cli exited; its error is the relevant one
+        if ff.returncode > 0:
+            ff_err.seek(0)
+            msg = ff_err.read().decode("utf-8", "replace")
+            logger.error("STT Subprocess Error: %s", msg)
+            raise STTError(f"STT process failed: {msg}")
+
+    if wh.returncode != 0:
+        logger.error("STT Subprocess Error: %s", err)
+        raise STTError(f"STT process failed: {err}")
+    return out.strip()
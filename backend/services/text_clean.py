@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import re
 
-SPACE_RE = re.compile(r"\s+")
-PUNCT_FIX_RE = re.compile(r"\s+([,.;:!?])")
+# one pass: a whitespace run collapses to " ", or vanishes before punctuation
+CLEAN_RE = re.compile(r"\s+([,.;:!?])?")
+
+
+def _clean_sub(m: re.Match[str]) -> str:
+    return m.group(1) or " "
+
 
 def clean_text(s: str) -> str:
     s = s.strip()
-    s = SPACE_RE.sub(" ", s)
-    s = PUNCT_FIX_RE.sub(r"\1", s)
-    return s
+    return CLEAN_RE.sub(_clean_sub, s)
@@ -1,28 +1,94 @@
 from __future__ import annotations
 
+import asyncio
 import subprocess
+import threading
 from pathlib import Path
+from urllib.parse import urlsplit
 
-from backend.config import ALLOW_NET_DOWNLOAD, DOWNLOADS_DIR, YTDLP_BIN
-from backend.services.video_ingest import IngestError
+import aiofiles
+import httpx
 
+from backend.config import ALLOW_NET_DOWNLOAD, ALLOWED_VIDEO_EXTS, DOWNLOADS_DIR, YTDLP_BIN
+from backend.services.storage import safe_unlink
+from backend.services.video_ingest import IngestError, url_to_cache_key
 
-def download_video_from_url(url: str) -> Path:
-    """
-    Optional network download mode (DEV ONLY).
-    Uses yt-dlp CLI (no API). Requires internet connection.
-    """
+# Shared pooled client for direct file URLs (keep-alive + HTTP/2, reused TLS).
+_HTTP = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    follow_redirects=True,
+    limits=httpx.Limits(max_keepalive_connections=8),
+)
+
+
+def _require_net_download() -> None:
     if not ALLOW_NET_DOWNLOAD:
         raise IngestError(
             "Network download disabled (offline mode). "
             "To enable: run with ALLOW_NET_DOWNLOAD=1"
         )
 
+
+def _direct_video_ext(url: str) -> str | None:
+    """Extension if the URL points straight at a video file (e.g. .../talk.mp4)."""
+    ext = Path(urlsplit(url).path).suffix.lower()
+    return ext if ext in ALLOWED_VIDEO_EXTS else None
+
+
+# In-process yt-dlp (pinned in requirements.txt; the CLI is the fallback):
+# import cost paid once, HTTP session reused across downloads.
+# YoutubeDL is not thread-safe.
+_YDL = None
+_YDL_LOCK = threading.Lock()
+
+
+def _ytdlp_lib(outtmpl: str):
+    """Shared YoutubeDL instance, or None when the yt_dlp package is missing."""
+    global _YDL
+    if _YDL is None:
+        try:
+            from yt_dlp import YoutubeDL
+        except ImportError:
+            return None
+        _YDL = YoutubeDL({
+            "format": "bv*+ba/best",
+            "merge_output_format": "mp4",
+            "outtmpl": outtmpl,
+            "quiet": True,
+            "noprogress": True,
+        })
+    return _YDL
+
+
+def download_video_from_url(url: str) -> Path:
+    """
+    Optional network download mode (DEV ONLY).
+    Uses the yt_dlp package in-process when installed, else the yt-dlp CLI.
+    Requires internet connection.
+    """
+    _require_net_download()
+
     DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Output: downloads/<video_id>.mp4 (yt-dlp will fill %(id)s)
     outtmpl = str(DOWNLOADS_DIR / "%(id)s.%(ext)s")
 
+    with _YDL_LOCK:
+        ydl = _ytdlp_lib(outtmpl)
+        if ydl is not None:
+            try:
+                info = ydl.extract_info(url, download=True)
+            except Exception as e:
+                raise IngestError(f"yt-dlp failed: {e}") from e
+            # final path after merging; prepare_filename is the pre-merge name
+            dl = (info.get("requested_downloads") or [{}])[0]
+            return Path(dl.get("filepath") or ydl.prepare_filename(info))
+
+    return _download_with_cli(url, outtmpl)
+
+
+def _download_with_cli(url: str, outtmpl: str) -> Path:
     cmd = [
         YTDLP_BIN,
         "-f",
@@ -31,6 +97,13 @@ def download_video_from_url(url: str) -> Path:
         "mp4",
         "-o",
         outtmpl,
+        # report the final (post-merge) path on stdout instead of us scanning
+        # the downloads dir; --print implies --simulate unless overridden
+        "--print",
+        "after_move:filepath",
+        "--no-simulate",
+        "--no-progress",
+        "--quiet",
         url,
     ]
 
@@ -39,9 +112,68 @@ def download_video_from_url(url: str) -> Path:
         msg = (r.stderr or r.stdout or "").strip()
         raise IngestError(f"yt-dlp failed: {msg}")
 
-    # Find newest file in downloads dir
+    lines = r.stdout.strip().splitlines()
+    if lines:
+        out = Path(lines[-1].strip())
+        if out.is_file():
+            return out
+
+    # Fallback (old yt-dlp without after_move): newest file in downloads dir
     files = sorted(DOWNLOADS_DIR.glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
     if not files:
         raise IngestError("Download succeeded but no output file found in downloads directory.")
 
     return files[0]
+
+
+async def download_video_from_url_http(url: str) -> Path | None:
+    """
+    Fast path for direct video-file URLs: stream the body to DOWNLOADS_DIR
+    over the shared client (no yt-dlp process).
+    Returns None when the server does not look like it serves a video file.
+    """
+    _require_net_download()
+
+    ext = _direct_video_ext(url)
+    if ext is None:
+        return None
+
+    try:
+        head = await _HTTP.head(url)
+    except httpx.HTTPError:
+        return None
+    ctype = head.headers.get("content-type", "").split(";")[0].strip().lower()
+    if head.status_code >= 400 or not (ctype.startswith("video/") or ctype == "application/octet-stream"):
+        return None
+
+    DOWNLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    out = DOWNLOADS_DIR / f"url_{url_to_cache_key(url)}{ext}"
+    tmp = out.with_name(out.name + ".part")
+    try:
+        async with _HTTP.stream("GET", url) as resp:
+            if resp.status_code >= 400:
+                raise IngestError(f"Download failed: HTTP {resp.status_code}")
+            async with aiofiles.open(tmp, "wb") as f:
+                async for chunk in resp.aiter_bytes(1 << 20):
+                    await f.write(chunk)
+        tmp.replace(out)
+    except httpx.HTTPError as e:
+        raise IngestError(f"Download failed: {e}") from e
+    finally:
+        safe_unlink(tmp)
+    return out
+
+
+async def download_video(url: str) -> Path:
+    """
+    Direct file URLs go through the pooled HTTP client; platform URLs
+    (YouTube, Facebook, ...) fall back to yt-dlp in a worker thread.
+    """
+    out = await download_video_from_url_http(url)
+    if out is not None:
+        return out
+    return await asyncio.to_thread(download_video_from_url, url)
+
+
+async def aclose_client() -> None:
+    await _HTTP.aclose()
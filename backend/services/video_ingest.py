@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import hashlib
+import os
+import threading
+import uuid
 from pathlib import Path
 from backend.config import ALLOWED_VIDEO_EXTS, UPLOADS_DIR, URL_CACHE_DIR
+from backend.services.storage import safe_unlink, stream_upload_to_disk
 
 class IngestError(RuntimeError):
     pass
@@ -11,18 +15,55 @@ def validate_video_ext(path: Path) -> None:
     if path.suffix.lower() not in ALLOWED_VIDEO_EXTS:
         raise IngestError(f"Unsupported video format: {path.suffix}. Allowed: {sorted(ALLOWED_VIDEO_EXTS)}")
 
-def save_upload_to_disk(filename: str, data: bytes) -> Path:
+async def save_upload_to_disk(filename: str, upload) -> Path:
+    """
+    Stream an UploadFile into UPLOADS_DIR without buffering it in memory.
+    File name stays content-addressed: upload_<blake2b-64 hex><ext>
+    (hashed while streaming, the file is never read back).
+    """
     ext = Path(filename).suffix.lower()
     if ext not in ALLOWED_VIDEO_EXTS:
         raise IngestError(f"Unsupported upload extension: {ext}")
 
-    out = UPLOADS_DIR / f"upload_{hashlib.sha256(data).hexdigest()[:16]}{ext}"
-    out.write_bytes(data)
+    tmp = UPLOADS_DIR / f".upload_{uuid.uuid4().hex}{ext}.part"
+    try:
+        # dedup key, not a security boundary: BLAKE2b is faster than SHA-256 without SHA-NI
+        hasher = hashlib.blake2b(digest_size=8)
+        await stream_upload_to_disk(upload, tmp, hasher=hasher)
+        out = UPLOADS_DIR / f"upload_{hasher.hexdigest()}{ext}"
+        tmp.replace(out)
+    finally:
+        safe_unlink(tmp)
     return out
 
 def url_to_cache_key(url: str) -> str:
-    # deterministic, safe offline key
-    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:24]
+    # deterministic, safe offline key. Stays SHA-256: users name url_cache
+    # files after it, so changing the hash would orphan existing entries.
+    return hashlib.sha256(url.strip().encode("utf-8"), usedforsecurity=False).hexdigest()[:24]
+
+# key -> cached video in URL_CACHE_DIR; rebuilt only when the directory's
+# mtime changes (a file was added, removed or renamed)
+_cache_index: dict[str, Path] = {}
+_cache_mtime_ns: int | None = None
+_cache_lock = threading.Lock()
+
+def _url_cache_index() -> dict[str, Path]:
+    global _cache_index, _cache_mtime_ns
+    try:
+        mtime = URL_CACHE_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _cache_lock:
+        if mtime != _cache_mtime_ns:
+            index: dict[str, Path] = {}
+            # scandir: entry type comes from readdir, no stat per file
+            with os.scandir(URL_CACHE_DIR) as it:
+                for entry in it:
+                    p = Path(entry.path)
+                    if p.suffix.lower() in ALLOWED_VIDEO_EXTS and entry.is_file():
+                        index.setdefault(p.stem, p)
+            _cache_index, _cache_mtime_ns = index, mtime
+        return _cache_index
 
 def resolve_url_offline(url: str) -> Path:
     """
@@ -32,16 +73,14 @@ def resolve_url_offline(url: str) -> Path:
     """
     key = url_to_cache_key(url)
     # user must place a file named like: <key>.mp4 (or mkv/avi/etc)
-    candidates = list(URL_CACHE_DIR.glob(f"{key}.*"))
-    if not candidates:
-        raise IngestError(
-            "Offline URL mode: video not found in local cache.\n"
-            f"Put the video file into: backend/storage/url_cache/\n"
-            f"Rename it to: {key}.mp4 (or .mkv/.avi etc)\n"
-            f"URL key: {key}"
-        )
-    # pick the first valid ext
-    for c in candidates:
-        if c.suffix.lower() in ALLOWED_VIDEO_EXTS:
-            return c
-    raise IngestError("Cache file exists but extension is not supported.")
+    hit = _url_cache_index().get(key)
+    if hit is not None:
+        return hit
+    if any(URL_CACHE_DIR.glob(f"{key}.*")):
+        raise IngestError("Cache file exists but extension is not supported.")
+    raise IngestError(
+        "Offline URL mode: video not found in local cache.\n"
+        f"Put the video file into: backend/storage/url_cache/\n"
+        f"Rename it to: {key}.mp4 (or .mkv/.avi etc)\n"
+        f"URL key: {key}"
+    )
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("orjson")
+
+from backend.services import chat_memory as cm
+from backend.services.chat_memory import ChatTurn
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(cm, "_cache", type(cm._cache)())
+
+
+def _contents(session_file):
+    return [t.content for t in cm.load_history(session_file)]
+
+
+def test_append_after_torn_line(tmp_path):
+    session = tmp_path / "s.jsonl"
+    cm.extend_and_save(session, [ChatTurn("user", "a"), ChatTurn("assistant", "b")])
+    # crash mid-append: half a JSON object, no trailing newline
+    with session.open("ab") as f:
+        f.write(b'{"role": "user", "con')
+
+    cm.extend_and_save(session, [ChatTurn("user", "after torn")])
+    cached = _contents(session)
+
+    cm._cache.clear()
+    assert _contents(session) == cached == ["a", "b", "after torn"]
+
+
+def test_compaction_keeps_concurrent_append(tmp_path, monkeypatch):
+    session = tmp_path / "s.jsonl"
+    n = cm.COMPACT_AT_LINES + 1
+    session.write_bytes(b"".join(
+        cm._dump_turn(ChatTurn("user", f"t{i}")) for i in range(n)
+    ))
+
+    # another request appends right after load_history has read the file
+    real_load = cm._safe_jsonl_load
+    calls = []
+
+    def load_then_append(path):
+        items = real_load(path)
+        if not calls:
+            calls.append(path)
+            cm.extend_and_save(path, [ChatTurn("assistant", "late")])
+        return items
+
+    monkeypatch.setattr(cm, "_safe_jsonl_load", load_then_append)
+    assert _contents(session)[-1] == "late"
+
+    cm._cache.clear()
+    assert _contents(session)[-1] == "late"
+    assert len(session.read_bytes().splitlines()) == cm.MAX_TURNS
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+try:
+    import mediapipe  # noqa: F401
+except ImportError:
+    # the pool is driven by _FakeTracker below: real graphs are never built
+    sys.modules["mediapipe"] = ModuleType("mediapipe")
+
+from backend.services import motion_features as mf
+from backend.services.stats import summarize_timeline
+
+
+class _FakeTracker:
+    """
+    Stands in for a video-mode Pose/Hands/FaceMesh: like MediaPipe's
+    tracking/smoothing, its output depends on the frames seen since reset().
+    """
+
+    def __init__(self) -> None:
+        self.frames_seen = 0
+
+    def process(self, rgb):
+        self.frames_seen += 1
+        k = self.frames_seen
+        pose = [SimpleNamespace(x=0.3 + 0.01 * k * (i % 3), y=0.4 + 0.005 * k) for i in range(33)]
+        hand = SimpleNamespace(landmark=[SimpleNamespace(x=0.5 + 0.02 * k, y=0.5) for _ in range(21)])
+        return SimpleNamespace(
+            pose_landmarks=SimpleNamespace(landmark=pose),
+            multi_hand_landmarks=[hand],
+            multi_face_landmarks=[object()] if k % 2 else None,
+        )
+
+    def reset(self) -> None:
+        self.frames_seen = 0
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(mf, "_new_solutions", lambda: (_FakeTracker(), _FakeTracker(), _FakeTracker()))
+    monkeypatch.setattr(mf, "_idle_solutions", [])
+    monkeypatch.setattr(mf, "_all_solutions", [])
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (64, 64))
+    if not writer.isOpened():
+        pytest.skip("OpenCV has no MJPG writer")
+    for i in range(50):
+        writer.write(np.full((64, 64, 3), i * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _stats(video_path):
+    timeline, _expl, feats_u8 = mf.analyze_motion(video_path)
+    return summarize_timeline(timeline, feats_u8)
+
+
+def test_pooled_solutions_match_fresh_solutions(fake_pool, video):
+    fresh = _stats(video)
+    assert fresh["count"] > 0
+
+    # second run gets the same (released) set back: it must behave as new
+    pooled = _stats(video)
+    assert len(mf._all_solutions) == 1
+    assert pooled == fresh